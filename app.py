@@ -1,136 +1,126 @@
 import streamlit as st
-import joblib
-import pandas as pd
-import numpy as np
-import requests
-import xgboost  # Ensure xgboost is installed via pip
 from dotenv import load_dotenv
+from hedged import CircuitBreaker, hedged_predict
+import audit_log
+import metrics
 import os
 
 # Load environment variables
 load_dotenv()
 API_KEY = os.getenv("WATSON_API_KEY")                                         #API_KEY = st.secrets["WATSON_API_KEY"]
+# Hybrid mode falls back to the local model when Watsonx takes longer than this
+WATSON_DEADLINE = float(os.getenv("WATSON_DEADLINE_MS", "1500")) / 1000
+# "numpy" serves the exported trees without loading the xgboost library
+SALARY_ENGINE = os.getenv("SALARY_ENGINE", "xgboost")
 
+# Per-stage timings (SALARY_METRICS=1); SALARY_METRICS_PORT also serves them at /metrics
+METRICS_PORT = os.getenv("SALARY_METRICS_PORT")
 
+# Heavy modules (pandas, sklearn, xgboost, requests, altair) are imported inside the
+# functions that need them, so the first render only pays for Streamlit itself
 
 
-# Load local model and preprocessing tools
+
+
+# Loaded once per process, then watched: a retrained model is loaded and warmed
+# on a background thread and swapped in while sessions keep predicting
 @st.cache_resource
+def load_live_model():
+    from hot_reload import LiveModel, load_serving_artifacts, warm_serving_artifacts
+
+    live = LiveModel(lambda: load_serving_artifacts(SALARY_ENGINE), warm=warm_serving_artifacts)
+    live.get()
+    return live.watch()
+
+# Artifacts of the version being served: model, scaler, encoders, fast path, grid
 def load_local_model():
-    model = joblib.load("salary_model_clean.pkl")
-    scaler = joblib.load("scaler_clean.pkl")
-    label_encoders = joblib.load("label_encoders_clean.pkl")
-    return model, scaler, label_encoders
+    return load_live_model().get()[1]
 
-# Local prediction function
-def predict_local(data):
-    model, scaler, label_encoders = load_local_model()
-
-    # Normalize positions and departments
-    position_mapping = {
-        "Software Engineer": "Developer",
-        "Engineer": "Developer",
-        "Software Developer": "Developer",
-        "Senior Developer": "Developer",
-        "Software Dev": "Developer",
-        "HR Executive": "Executive",
-        "Sales Executive": "Executive",
-        "Support Staff": "Support",
-        "Marketing Executive": "Executive",
-        "Consulting Engineer": "Consultant",
-        "Accountant": "Analyst"
-    }
+# One shared client: cached IAM token + pooled keep-alive connections,
+# with a TTL+LRU cache of predictions in front of the deployment
+@st.cache_resource
+def load_watsonx_client():
+    from watsonx_client import WatsonxClient, default_result_cache
 
-    department_mapping = {
-        "Software": "Engineering",
-        "Tech": "Engineering",
-        "Technical": "Engineering",
-        "IT": "Engineering",
-        "People": "HR",
-        "Customer Service": "Support",
-        "Business": "Sales"
-    }
+    return WatsonxClient(API_KEY, cache=default_result_cache())
+
+# Append-only audit trail of every prediction, written by a background thread
+# (SALARY_AUDIT=0 turns it off; audit_log.py scans it for drift)
+@st.cache_resource
+def load_audit_log():
+    from audit_log import AuditLog
+
+    return AuditLog(app="app.py")
 
-    data["Position"] = data["Position"].replace(position_mapping)
-    data["Department"] = data["Department"].replace(department_mapping)
+# Shared across sessions so repeated Watsonx failures stop everyone calling it
+@st.cache_resource
+def load_circuit_breaker():
+    return CircuitBreaker()
+
+# One Prometheus exporter per process, however many sessions run the script
+@st.cache_resource(show_spinner=False)
+def start_metrics_exporter():
+    return metrics.start_exporter(int(METRICS_PORT))
+
+if metrics.enabled and METRICS_PORT:
+    start_metrics_exporter()
 
-    # Encode labels
-    for col in label_encoders:
-        if col in data.columns:
-            le = label_encoders[col]
-            if data[col].iloc[0] not in le.classes_:
-                return f"❌ Unknown label '{data[col].iloc[0]}' in column '{col}'"
-            data[col] = le.transform(data[col])
+# This session's latest request of each kind, as timed by metrics.request()
+def request_timings():
+    return st.session_state.setdefault("request_timings", {})
 
-    # Scale numerical values
-    scaled_data = scaler.transform(data)
+# Stage breakdown of this session's last local and Watsonx prediction
+def show_debug_panel():
+    with st.expander("🛠️ Debug: last request timings"):
+        for kind in ("local", "watsonx"):
+            table = metrics.breakdown_markdown(kind, request_timings().get(kind))
+            if table:
+                st.markdown(table)
 
-    # Predict
-    pred = model.predict(scaled_data)
-    return f"💰 Predicted Salary (Local Model): ₹{pred[0]:,.2f}"
+# Batch prediction: N rows in, predictions plus a per-row error mask out
+def predict_local_batch(data):
+    from jobl import predict_batch
+
+    model, scaler, label_encoders, _, _ = load_local_model()
+    return predict_batch(data, model, scaler, label_encoders)
+
+# Local prediction function
+def predict_local(record):
+    from jobl import predict_one
+
+    with metrics.request("local") as timing:
+        request_timings()["local"] = timing
+        with metrics.stage("load_model"):
+            version, (model, _, _, fast, grid) = load_live_model().get()
+        # Which model answered, shown under the result
+        st.session_state["local_model_version"] = version
+        return predict_one(record, model, fast, grid)
 
 # Watsonx API prediction function
-def predict_watsonx(data):
+def predict_watsonx(data, client=None, timings=None):
     if not API_KEY:
-        return "❌ API key not found. Set it in a .env file with key: WATSON_API_KEY"
-
-    # Step 1: Get IAM token
-    token_response = requests.post(
-        'https://iam.cloud.ibm.com/identity/token',
-        data={
-            "apikey": API_KEY,
-            "grant_type": 'urn:ibm:params:oauth:grant-type:apikey'
-        }
-    )
-
-    if token_response.status_code != 200:
-        return f"❌ Token fetch failed: {token_response.status_code} - {token_response.text}"
-
-    mltoken = token_response.json()["access_token"]
-    header = {
-        'Content-Type': 'application/json',
-        'Authorization': f'Bearer {mltoken}'
-    }
+        return None, "❌ API key not found. Set it in a .env file with key: WATSON_API_KEY"
 
-    # Step 2: Use expected fields and dummy values for required ones
-    payload_scoring = {
-        "input_data": [
-            {
-                "fields": [
-                    "Employee_ID",
-                    "Employee_Name",
-                    "Age",
-                    "Country",
-                    "Department",
-                    "Position",
-                    "Joining_Date"
-                ],
-                "values": [[
-                    "EMP102",                        # dummy ID
-                    "Test User",                     # dummy name
-                    int(data["Age"].iloc[0]),
-                    data["Country"].iloc[0],
-                    data["Department"].iloc[0],
-                    data["Position"].iloc[0],
-                    "2023-01-01"                     # dummy joining date
-                ]]
-            }
-        ]
-    }
+    # Use expected fields and dummy values for required ones
+    row = [
+        "EMP102",                        # dummy ID
+        "Test User",                     # dummy name
+        int(data["Age"]),
+        data["Country"],
+        data["Department"],
+        data["Position"],
+        "2023-01-01"                     # dummy joining date
+    ]
 
-    # Step 3: Make request
-    response = requests.post(
-        url='https://au-syd.ml.cloud.ibm.com/ml/v4/deployments/23558892-2ba7-4318-a1c3-ad980f07df57/predictions?version=2021-05-01',
-        json=payload_scoring,
-        headers=header
-    )
+    from watsonx_client import WatsonxError
 
     try:
-        result = response.json()
-        prediction = result["predictions"][0]["values"][0][0]
-        return f"💰 Predicted Salary (Watsonx API): ₹{prediction:,.2f}"
-    except Exception as e:
-        return f"❌ Error from Watson API: {e}\n\nRaw Response: {response.text}"
+        with metrics.request("watsonx") as timing:
+            (request_timings() if timings is None else timings)["watsonx"] = timing
+            prediction = (client or load_watsonx_client()).score_one(row)
+    except WatsonxError as e:
+        return None, f"❌ {e}"
+    return prediction, None
 
 
 # ------------------------------
@@ -139,7 +129,7 @@ def predict_watsonx(data):
 st.title("💼 Salary Prediction App")
 st.markdown("Use either your local trained model or IBM Watsonx API to predict employee salary.")
 
-mode = st.radio("Select Prediction Method", ["Local Model", "Watsonx API"])
+mode = st.radio("Select Prediction Method", ["Local Model", "Watsonx API", "Hybrid (Watsonx with local fallback)"])
 
 st.subheader("Enter Employee Details:")
 age = st.number_input("Age", 18, 65, value=30)
@@ -152,17 +142,46 @@ position = st.selectbox("Position", [
 years_exp = st.slider("Years of Experience", 0, 40, value=5)
 
 if st.button("🔮 Predict"):
-    user_data = pd.DataFrame([{
+    user_data = {
         "Age": age,
         "Country": country,
         "Department": department,
         "Position": position,
         "YearsExperience": years_exp
-    }])
+    }
 
     if mode == "Local Model":
-        result = predict_local(user_data)
+        prediction, error = predict_local(user_data)
+        backend = "Local Model"
+    elif mode == "Watsonx API":
+        prediction, error = predict_watsonx(user_data)
+        backend = "Watsonx API"
+    else:
+        # Resolve the cached client and this session's timings here: the remote call runs off the script thread
+        client, timings = load_watsonx_client(), request_timings()
+        result = hedged_predict(
+            lambda: predict_watsonx(user_data, client, timings),
+            lambda: predict_local(user_data),
+            load_circuit_breaker(),
+            deadline=WATSON_DEADLINE,
+        )
+        prediction, error, backend = result.prediction, result.error, result.backend
+        st.caption(f"⏱️ Answered by {backend} in {result.elapsed * 1000:.0f} ms" + (f" — {result.note}" if result.note else ""))
+
+    if audit_log.enabled:
+        version = st.session_state.get("local_model_version") if backend == "Local Model" else None
+        load_audit_log().record(user_data, prediction, error, backend, version)
+
+    if mode != "Local Model" and API_KEY:
+        stats = load_watsonx_client().cache.stats()
+        st.caption(f"🗄️ Watsonx result cache: {stats['hits']} hits / {stats['misses']} misses ({stats['size']} entries)")
+
+    if error:
+        st.error(error)
     else:
-        result = predict_watsonx(user_data)
+        st.success(f"💰 Predicted Salary ({backend}): ₹{prediction:,.2f}")
+        if backend == "Local Model":
+            st.caption(f"🧠 Model version {st.session_state['local_model_version']}")
 
-    st.success(result)
+    if metrics.enabled:
+        show_debug_panel()
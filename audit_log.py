@@ -0,0 +1,308 @@
+import argparse
+import atexit
+import glob
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+# Every prediction the apps serve is appended here unless SALARY_AUDIT=0
+enabled = os.getenv("SALARY_AUDIT", "1") == "1"
+AUDIT_DIR = os.getenv("SALARY_AUDIT_DIR", "audit_logs")
+
+# Inputs recorded as given (before alias normalization), so the trail shows what was asked
+INPUT_FIELDS = ["Employee_ID", "Age", "Country", "Department", "Position", "YearsExperience", "Joining_Date"]
+
+# PSI above these is reported as moderate / major drift
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+
+# Numbers segments across every AuditLog in the process, so two logs never share a file
+_segment_ids = itertools.count()
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("timestamp", pa.timestamp("ms", tz="UTC")),
+        ("app", pa.string()),
+        ("backend", pa.string()),
+        ("model_version", pa.string()),
+        ("Employee_ID", pa.string()),
+        ("Age", pa.float64()),
+        ("Country", pa.string()),
+        ("Department", pa.string()),
+        ("Position", pa.string()),
+        ("YearsExperience", pa.float64()),
+        ("Joining_Date", pa.string()),
+        ("prediction", pa.float64()),
+        ("error", pa.string()),
+    ])
+
+
+class AuditLog:
+    # Append-only audit trail. record() only appends to an in-memory list; a
+    # background thread writes the pending entries every flush_interval seconds
+    # (sooner once batch_size are waiting) as one compressed Arrow record batch.
+    # Segments are Arrow IPC streams: every batch is complete on disk as soon as
+    # it is written, so a crash loses at most the entries not yet flushed.
+    # A segment is closed and a new one started after max_bytes or max_age seconds.
+
+    def __init__(self, directory=AUDIT_DIR, app=None, flush_interval=1.0, batch_size=1000,
+                 max_bytes=64 * 1024 * 1024, max_age=3600.0, max_pending=100_000):
+        self.directory = directory
+        self.app = app
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # Past this many unwritten entries, record() writes on the caller's thread instead
+        self.max_pending = max_pending
+        self.written = 0
+        self.segments = 0
+        self.error = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._sink = None
+        self._writer = None
+        self._opened_at = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True, name="audit-writer")
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, inputs, prediction, error, backend, model_version=None):
+        entry = {field: inputs.get(field) for field in INPUT_FIELDS}
+        for field in ("Employee_ID", "Joining_Date"):
+            if entry[field] is not None:
+                entry[field] = str(entry[field])
+        entry.update(
+            timestamp=int(time.time() * 1000),
+            app=self.app,
+            backend=backend,
+            model_version=model_version,
+            prediction=None if error or prediction is None else float(prediction),
+            error=error or None,
+        )
+        with self._lock:
+            self._pending.append(entry)
+            pending = len(self._pending)
+        if pending >= self.max_pending:
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wake.set()
+
+    # ------------------------------
+    # Writer side
+    # ------------------------------
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Entries stay pending and are retried on the next pass
+                self.error = f"{type(e).__name__}: {e}"
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                entries, self._pending = self._pending, []
+            if not entries:
+                self._rotate_if_due()
+                return 0
+            import pyarrow as pa
+
+            try:
+                batch = pa.RecordBatch.from_pylist(entries, schema=_schema())
+                self._rotate_if_due()
+                if self._writer is None:
+                    self._open_segment(batch.schema)
+                self._writer.write_batch(batch)
+            except Exception:
+                with self._lock:
+                    self._pending[:0] = entries
+                raise
+            self.written += len(entries)
+            self.error = None
+            return len(entries)
+
+    def _open_segment(self, schema):
+        import pyarrow as pa
+
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(self.directory, f"audit-{stamp}-{os.getpid()}-{next(_segment_ids):04d}.arrows")
+        self._sink = pa.OSFile(path, "wb")
+        self._writer = pa.ipc.new_stream(self._sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+        self._opened_at = time.time()
+        self.segments += 1
+
+    def _rotate_if_due(self):
+        if self._writer is None:
+            return
+        if self._sink.tell() >= self.max_bytes or time.time() - self._opened_at >= self.max_age:
+            self._close_segment()
+
+    def _close_segment(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            self._writer = self._sink = None
+
+    def close(self):
+        # Writes everything still pending; registered with atexit
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        try:
+            self.flush()
+        finally:
+            with self._write_lock:
+                self._close_segment()
+
+
+# ------------------------------
+# Reader side
+# ------------------------------
+def _read_segment(path, columns):
+    # Reads every complete batch; a segment still being written (or cut short by
+    # a crash) simply ends at its last complete batch
+    import pyarrow as pa
+
+    batches = []
+    try:
+        with pa.OSFile(path, "rb") as source:
+            reader = pa.ipc.open_stream(source)
+            while True:
+                try:
+                    batch = reader.read_next_batch()
+                except StopIteration:
+                    break
+                batches.append(batch.select(columns) if columns else batch)
+    except (pa.ArrowInvalid, OSError):
+        pass
+    return batches
+
+
+def read_audit(directory=AUDIT_DIR, columns=None, since=None):
+    # One Arrow table of every segment in the directory; since is a datetime or epoch seconds
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if columns and since is not None and "timestamp" not in columns:
+        columns = ["timestamp"] + list(columns)
+    schema = _schema()
+    if columns:
+        schema = pa.schema([schema.field(name) for name in columns])
+    batches = []
+    for path in sorted(glob.glob(os.path.join(directory, "audit-*.arrows"))):
+        batches.extend(_read_segment(path, columns))
+    table = pa.Table.from_batches(batches, schema=schema)
+    if since is not None:
+        since = since if isinstance(since, datetime) else datetime.fromtimestamp(since, timezone.utc)
+        table = table.filter(pc.greater_equal(table["timestamp"], pa.scalar(since, type=schema.field("timestamp").type)))
+    return table
+
+
+def population_stability(expected, actual):
+    # PSI between two share vectors over the same bins
+    import numpy as np
+
+    expected = np.clip(expected, 1e-6, None)
+    actual = np.clip(actual, 1e-6, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def drift_report(audit, training):
+    # audit: read_audit(...).to_pandas(); training: cleaned records (ingest.read_records).
+    # Inputs are normalized the way training data is before they are compared
+    import numpy as np
+    import pandas as pd
+
+    from jobl import DEPARTMENT_MAPPING, POSITION_MAPPING
+
+    audit = audit.copy()
+    # app2's Watsonx requests carry a joining date instead of years of experience
+    joining = pd.to_datetime(audit["Joining_Date"], errors="coerce")
+    audit["YearsExperience"] = audit["YearsExperience"].fillna(audit["timestamp"].dt.year - joining.dt.year)
+    audit["Department"] = audit["Department"].replace(DEPARTMENT_MAPPING)
+    audit["Position"] = audit["Position"].replace(POSITION_MAPPING)
+
+    rows = []
+    numeric = [("Age", "Age"), ("YearsExperience", "YearsExperience"), ("prediction", "Salary")]
+    for served, trained in numeric:
+        values = audit[served].dropna().to_numpy()
+        reference = training[trained].dropna().to_numpy()
+        if not len(values):
+            continue
+        # Deciles of the training data, open-ended at both sides
+        edges = np.unique(np.quantile(reference, np.linspace(0, 1, 11))[1:-1])
+        edges = np.concatenate([[-np.inf], edges, [np.inf]])
+        expected = np.histogram(reference, edges)[0] / len(reference)
+        actual = np.histogram(values, edges)[0] / len(values)
+        rows.append({
+            "column": served, "rows": len(values), "psi": population_stability(expected, actual),
+            "served": f"mean {values.mean():,.1f}", "training": f"mean {reference.mean():,.1f}", "unseen": 0.0,
+        })
+
+    for column in ["Country", "Department", "Position"]:
+        values = audit[column].dropna()
+        if not len(values):
+            continue
+        reference = training[column].astype(str).value_counts(normalize=True)
+        served = values.value_counts(normalize=True)
+        categories = reference.index.union(served.index)
+        rows.append({
+            "column": column, "rows": len(values),
+            "psi": population_stability(reference.reindex(categories, fill_value=0).to_numpy(),
+                                        served.reindex(categories, fill_value=0).to_numpy()),
+            "served": f"top {served.index[0]} ({served.iloc[0]:.0%})",
+            "training": f"top {reference.index[0]} ({reference.iloc[0]:.0%})",
+            # Values the model has never seen, which it can only reject
+            "unseen": float(served[~served.index.isin(reference.index)].sum()),
+        })
+    return pd.DataFrame(rows, columns=["column", "rows", "psi", "served", "training", "unseen"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan the prediction audit log and compare it with the training data.")
+    parser.add_argument("--dir", default=AUDIT_DIR, help="Audit log directory")
+    parser.add_argument("--data", default="employee_records.csv", help="Training records to compare against")
+    parser.add_argument("--since-hours", type=float, default=None, help="Only entries from the last N hours")
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    from ingest import read_records
+
+    since = time.time() - args.since_hours * 3600 if args.since_hours else None
+    start = time.perf_counter()
+    table = read_audit(args.dir, since=since)
+    scanned = time.perf_counter() - start
+    if not table.num_rows:
+        raise SystemExit(f"⚠️ No audit entries in {args.dir}")
+    audit = table.to_pandas()
+    print(f"✅ Scanned {table.num_rows:,} audit entries in {scanned * 1000:.0f} ms "
+          f"({audit['timestamp'].min():%Y-%m-%d %H:%M} → {audit['timestamp'].max():%Y-%m-%d %H:%M} UTC)")
+    print(f"   errors      {audit['error'].notna().mean():.1%}")
+    for (backend, version), count in audit.groupby(["backend", "model_version"], dropna=False).size().items():
+        print(f"   {backend or 'n/a':<12} model {version if isinstance(version, str) else '—':<14} {count:,}")
+
+    training = pd.concat(read_records(args.data, chunksize=1_000_000), ignore_index=True)
+    report = drift_report(audit, training)
+    print(f"\n{'column':<16} {'rows':>8} {'psi':>7}  {'served':<28} {'training':<28} {'unseen':>7}")
+    for row in report.itertuples():
+        flag = " ❌" if row.psi > PSI_ALERT else " ⚠️" if row.psi > PSI_WARN else ""
+        print(f"{row.column:<16} {row.rows:>8,} {row.psi:>7.3f}  {row.served:<28} {row.training:<28} {row.unseen:>6.1%}{flag}")
+
+
+if __name__ == "__main__":
+    main()
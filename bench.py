@@ -0,0 +1,334 @@
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+BASELINE_PATH = "bench_baseline.json"
+SUITES = ["local", "batch", "train", "watsonx"]
+# Opt-in suites (minutes to hours): --suites scale
+EXTRA_SUITES = ["scale"]
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Inputs offered by the app forms, so the single-row numbers reflect real traffic
+UI_COUNTRIES = ["India", "USA", "UK", "Germany", "Canada"]
+UI_DEPARTMENTS = ["IT", "Software", "Technical", "HR", "Customer Service", "Business"]
+UI_POSITIONS = [
+    "Software Engineer", "Engineer", "Senior Developer", "HR Executive", "Sales Executive",
+    "Support Staff", "Marketing Executive", "Consulting Engineer", "Accountant",
+]
+
+
+def ui_records(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "Age": rng.randint(18, 65),
+        "Country": rng.choice(UI_COUNTRIES),
+        "Department": rng.choice(UI_DEPARTMENTS),
+        "Position": rng.choice(UI_POSITIONS),
+        "YearsExperience": rng.randint(0, 40),
+    } for _ in range(n)]
+
+
+def metric(value, better, noise=0.0):
+    # Changes smaller than `noise` (absolute, in the metric's unit) never count as regressions
+    return {"value": float(value), "better": better, "noise": noise}
+
+
+def latency_metrics(prefix, rounds, noise_ms):
+    # Best of several rounds, so one scheduler hiccup does not move p99
+    ms = [np.asarray(samples) * 1000 for samples in rounds]
+    return {
+        f"{prefix}.p50_ms": metric(min(np.percentile(r, 50) for r in ms), "lower", noise_ms),
+        f"{prefix}.p99_ms": metric(min(np.percentile(r, 99) for r in ms), "lower", noise_ms),
+    }
+
+
+def time_calls(fn, args_list, rounds=3, warmup=20):
+    for args in args_list[:warmup]:
+        fn(*args)
+    results = []
+    for _ in range(rounds):
+        samples = []
+        for args in args_list:
+            start = time.perf_counter()
+            fn(*args)
+            samples.append(time.perf_counter() - start)
+        results.append(samples)
+    return results
+
+
+def sample_records(path, rows, seed=0):
+    data = pd.read_csv(path)
+    return data.sample(n=rows, replace=rows > len(data), random_state=seed).reset_index(drop=True)
+
+
+# ------------------------------
+# Suites; each returns {metric: {"value": ..., "better": "lower"|"higher"}}
+# ------------------------------
+def bench_local(args):
+    from jobl import FastPreprocessor, load_artifacts, predict_one
+    from prediction_grid import load_grid
+
+    metrics = {}
+    records = [(r,) for r in ui_records(args.requests)]
+    for engine in ["xgboost", "numpy"]:
+        model, scaler, label_encoders = load_artifacts(engine=engine)
+        fast = FastPreprocessor(scaler, label_encoders)
+        rounds = time_calls(lambda r: predict_one(r, model, fast), records)
+        metrics.update(latency_metrics(f"local.{engine}", rounds, noise_ms=0.5))
+
+    # The grid serves in front of the xgboost engine, as in the apps
+    model, scaler, label_encoders = load_artifacts(engine="xgboost")
+    fast = FastPreprocessor(scaler, label_encoders)
+    grid = load_grid(label_encoders)
+    if grid is not None:
+        rounds = time_calls(lambda r: predict_one(r, model, fast, grid), records)
+        metrics.update(latency_metrics("local.grid", rounds, noise_ms=0.5))
+    else:
+        print("⚠️ No prediction grid (run prediction_grid.py); skipping local.grid")
+    return metrics
+
+
+def bench_batch(args):
+    from jobl import load_artifacts, predict_batch
+
+    metrics = {}
+    data = sample_records(args.data, max(args.batch_sizes))
+    for engine in ["xgboost", "numpy"]:
+        model, scaler, label_encoders = load_artifacts(engine=engine)
+        for rows in args.batch_sizes:
+            chunk = data.head(rows)
+            predict_batch(chunk.head(100), model, scaler, label_encoders)
+            # Small batches finish in milliseconds, so they get more runs to find the best
+            repeats = max(args.repeats, 20_000 // rows)
+            best = min(_timed(predict_batch, chunk, model, scaler, label_encoders) for _ in range(repeats))
+            metrics[f"batch.{engine}.{rows}.rows_per_s"] = metric(rows / best, "higher")
+    return metrics
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def bench_train(args):
+    # my.py writes its artifacts to the working directory, so it runs in a scratch dir
+    metrics = {}
+    with tempfile.TemporaryDirectory(prefix="salary_bench_") as workdir:
+        env = dict(os.environ, PYTHONPATH=HERE)
+        for rows in args.train_sizes:
+            data_path = os.path.join(workdir, f"records_{rows}.csv")
+            sample_records(args.data, rows).to_csv(data_path, index=False)
+            for mode in ["default", "fast"]:
+                cmd = [sys.executable, os.path.join(HERE, "my.py"), "--data", data_path, "--no-cache"]
+                if mode == "fast":
+                    cmd.append("--fast")
+                fit, total = [], []
+                for _ in range(args.repeats):
+                    proc = subprocess.run(cmd, cwd=workdir, env=env, capture_output=True, text=True)
+                    if proc.returncode != 0:
+                        raise RuntimeError(f"my.py failed on {rows} rows:\n{proc.stderr[-2000:]}")
+                    # Stage timings from my.py's report, e.g. "   fit            1.23s"
+                    stages = dict(re.findall(r"^\s+(\w+)\s+([\d.]+)s$", proc.stdout, flags=re.M))
+                    fit.append(float(stages["fit"]))
+                    total.append(float(stages["total"]))
+                # my.py reports to 10 ms and short fits jitter with thread scheduling
+                metrics[f"train.{mode}.{rows}.fit_s"] = metric(min(fit), "lower", noise=0.1)
+                metrics[f"train.{mode}.{rows}.total_s"] = metric(min(total), "lower", noise=0.1)
+    return metrics
+
+
+def run_measured(cmd, workdir, env):
+    # Wall time and peak RSS of one child process. Output goes to a file, not a pipe,
+    # so a chatty child never blocks; wait4 reports that child's own ru_maxrss
+    log_path = os.path.join(workdir, "child.log")
+    with open(log_path, "w") as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            peak = usage.ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else usage.ru_maxrss / 1024
+        else:  # Windows
+            proc.wait()
+            peak = None
+        elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        with open(log_path) as f:
+            raise RuntimeError(f"{os.path.basename(cmd[1])} failed:\n{f.read()[-2000:]}")
+    return elapsed, peak
+
+
+def bench_scale(args):
+    # Synthetic files of each size (synth_data.py), trained with my.py --fast and scored with jobl.py.
+    # Each size runs once: at millions of rows the run-to-run noise is small next to the totals
+    from synth_data import write_records
+
+    metrics = {}
+    env = dict(os.environ, PYTHONPATH=HERE)
+    print(f"\n{'rows':>12} {'generate':>9} {'train':>9} {'train MB':>9} {'score':>9} {'score MB':>9} {'rows/s':>10}")
+    with tempfile.TemporaryDirectory(prefix="salary_scale_") as workdir:
+        for rows in args.scale_sizes:
+            data_path = os.path.join(workdir, f"records_{rows}.csv")
+            start = time.perf_counter()
+            write_records(data_path, rows, source=args.data, seed=0, alias_rate=0.02)
+            generate = time.perf_counter() - start
+
+            train, train_peak = run_measured(
+                [sys.executable, os.path.join(HERE, "my.py"), "--data", data_path, "--no-cache", "--fast",
+                 "--chunksize", str(args.scale_chunksize)], workdir, env)
+            score, score_peak = run_measured(
+                [sys.executable, os.path.join(HERE, "jobl.py"), "--input", data_path,
+                 "--output", os.path.join(workdir, "predictions.csv"), "--chunksize", str(args.scale_chunksize)],
+                workdir, env)
+            os.remove(data_path)
+
+            metrics[f"scale.{rows}.train_s"] = metric(train, "lower", noise=1.0)
+            metrics[f"scale.{rows}.score_rows_per_s"] = metric(rows / score, "higher")
+            if train_peak is not None:
+                metrics[f"scale.{rows}.train_peak_mb"] = metric(train_peak, "lower", noise=50)
+                metrics[f"scale.{rows}.score_peak_mb"] = metric(score_peak, "lower", noise=50)
+            peaks = [f"{p:>9,.0f}" if p is not None else f"{'n/a':>9}" for p in (train_peak, score_peak)]
+            print(f"{rows:>12,} {generate:>8.1f}s {train:>8.1f}s {peaks[0]} {score:>8.1f}s {peaks[1]} {rows / score:>10,.0f}",
+                  flush=True)
+    return metrics
+
+
+def bench_watsonx(args):
+    from mock_watsonx import start_mock_server
+    from watsonx_client import WatsonxClient
+
+    server = start_mock_server(latency=args.mock_latency_ms / 1000)
+    # No result cache: every call goes over the wire
+    client = WatsonxClient("bench", iam_url=f"{server.base_url}/identity/token", scoring_base_url=server.base_url)
+    try:
+        rows = [["EMP102", "Test User", r["Age"], r["Country"], r["Department"], r["Position"], "2023-01-01"]
+                for r in ui_records(args.remote_requests)]
+        rounds = time_calls(client.score_one, [(row,) for row in rows], rounds=1, warmup=5)
+        metrics = latency_metrics("watsonx.single", rounds, noise_ms=2.0)
+
+        values = rows * max(1, 5000 // len(rows))
+        elapsed = min(_timed(client.score_rows, values, 500, 4) for _ in range(args.repeats))
+        metrics["watsonx.batch.rows_per_s"] = metric(len(values) / elapsed, "higher")
+    finally:
+        client.close()
+        server.shutdown()
+    return metrics
+
+
+SUITE_FUNCS = {"local": bench_local, "batch": bench_batch, "train": bench_train, "watsonx": bench_watsonx,
+               "scale": bench_scale}
+
+# Settings each suite's numbers depend on; only those of the suites that ran are compared
+SUITE_SETTINGS = {
+    "local": ["requests"],
+    "batch": ["data", "batch_sizes", "repeats"],
+    "train": ["data", "train_sizes", "repeats"],
+    "watsonx": ["remote_requests", "mock_latency_ms", "repeats"],
+    "scale": ["data", "scale_sizes", "scale_chunksize"],
+}
+
+
+# ------------------------------
+# Baseline comparison
+# ------------------------------
+def compare(results, baseline, threshold, suites):
+    regressions = []
+    print(f"\n{'metric':<36} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None:
+            print(f"{name:<36} {'—':>12} {current['value']:>12.3f}")
+            continue
+        delta = current["value"] - base["value"]
+        change = delta / base["value"] if base["value"] else 0.0
+        worse = change > threshold if current["better"] == "lower" else change < -threshold
+        worse = worse and abs(delta) > current.get("noise", 0.0)
+        flag = " ❌" if worse else ""
+        print(f"{name:<36} {base['value']:>12.3f} {current['value']:>12.3f} {change:>+7.0%}{flag}")
+        if worse:
+            regressions.append(name)
+    settings = {name for suite in suites for name in SUITE_SETTINGS[suite]}
+    baseline_config = baseline.get("config", {})
+    if any(baseline_config.get(name) != results["config"].get(name) for name in settings):
+        print("⚠️ Baseline was recorded with different settings; numbers may not be comparable")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local inference, batch scoring, training and the Watsonx client.")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated subset of {SUITES + EXTRA_SUITES}")
+    parser.add_argument("--data", default="employee_records.csv", help="Records used for batch and training runs")
+    parser.add_argument("--requests", type=int, default=2000, help="Single-row local predictions timed")
+    parser.add_argument("--batch-sizes", default="1000,10000,100000", help="Batch sizes for throughput")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per batch size, training size and remote batch (best is kept)")
+    parser.add_argument("--train-sizes", default="10000,30000,100000", help="Dataset sizes for my.py (larger than the CSV are resampled)")
+    parser.add_argument("--scale-sizes", default="1000000,10000000", help="Synthetic dataset sizes for the scale suite")
+    parser.add_argument("--scale-chunksize", type=int, default=1_000_000, help="Rows read per chunk by my.py and jobl.py in the scale suite")
+    parser.add_argument("--remote-requests", type=int, default=200, help="Single-row Watsonx calls timed")
+    parser.add_argument("--mock-latency-ms", type=float, default=20, help="Latency injected by the mock Watsonx server")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write this run's results")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.3, help="Allowed relative regression (0.3 = 30%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+    args.batch_sizes = [int(n) for n in args.batch_sizes.split(",")]
+    args.train_sizes = [int(n) for n in args.train_sizes.split(",")]
+    args.scale_sizes = [int(n) for n in args.scale_sizes.split(",")]
+    if min(args.scale_sizes) < 1 or args.scale_chunksize < 1:
+        parser.error("--scale-sizes and --scale-chunksize must be at least 1")
+
+    suites = [s for s in args.suites.split(",") if s]
+    unknown = set(suites) - set(SUITE_FUNCS)
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(sorted(unknown))}")
+
+    # Which suites ran is not a setting: a subset compares against the matching part of the baseline
+    config = {k: v for k, v in vars(args).items() if k not in ("suites", "output", "baseline", "threshold", "update_baseline")}
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": config,
+        "metrics": {},
+    }
+    for suite in suites:
+        start = time.perf_counter()
+        results["metrics"].update(SUITE_FUNCS[suite](args))
+        print(f"✅ {suite} suite in {time.perf_counter() - start:.1f}s")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📝 Results → {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline updated → {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}; rerun with --update-baseline to record one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, suites)
+    if regressions:
+        print(f"❌ {len(regressions)} metric(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"✅ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
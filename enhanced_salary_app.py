@@ -1,91 +1,162 @@
 import streamlit as st
-import joblib
-import pandas as pd
-import numpy as np
-import requests
-import altair as alt
-import xgboost
 from dotenv import load_dotenv
+from hedged import CircuitBreaker, hedged_predict
+import audit_log
+import metrics
 import os
 
 # Load environment variables
 load_dotenv()
 API_KEY = os.getenv("WATSON_API_KEY")
+# Hybrid mode falls back to the local model when Watsonx takes longer than this
+WATSON_DEADLINE = float(os.getenv("WATSON_DEADLINE_MS", "1500")) / 1000
+# "numpy" serves the exported trees without loading the xgboost library
+SALARY_ENGINE = os.getenv("SALARY_ENGINE", "xgboost")
 
+# Per-stage timings (SALARY_METRICS=1); SALARY_METRICS_PORT also serves them at /metrics
+METRICS_PORT = os.getenv("SALARY_METRICS_PORT")
+
+# Heavy modules (pandas, sklearn, xgboost, requests, altair) are imported inside the
+# functions that need them, so the first render only pays for Streamlit itself
+
+# Loaded once per process, then watched: a retrained model is loaded and warmed
+# on a background thread and swapped in while sessions keep predicting
 @st.cache_resource
+def load_live_model():
+    from hot_reload import LiveModel, load_serving_artifacts, warm_serving_artifacts
+
+    live = LiveModel(lambda: load_serving_artifacts(SALARY_ENGINE), warm=warm_serving_artifacts)
+    live.get()
+    return live.watch()
+
+# Artifacts of the version being served: model, scaler, encoders, fast path, grid
 def load_local_model():
-    model = joblib.load("salary_model_clean.pkl")
-    scaler = joblib.load("scaler_clean.pkl")
-    label_encoders = joblib.load("label_encoders_clean.pkl")
-    return model, scaler, label_encoders
-
-def predict_local(data):
-    model, scaler, label_encoders = load_local_model()
-
-    position_mapping = {
-        "Software Engineer": "Developer", "Engineer": "Developer",
-        "Software Developer": "Developer", "Senior Developer": "Developer",
-        "Software Dev": "Developer", "HR Executive": "Executive",
-        "Sales Executive": "Executive", "Support Staff": "Support",
-        "Marketing Executive": "Executive", "Consulting Engineer": "Consultant",
-        "Accountant": "Analyst"
-    }
-    department_mapping = {
-        "Software": "Engineering", "Tech": "Engineering", "Technical": "Engineering",
-        "IT": "Engineering", "People": "HR", "Customer Service": "Support", "Business": "Sales"
-    }
+    return load_live_model().get()[1]
+
+# One shared client: cached IAM token + pooled keep-alive connections,
+# with a TTL+LRU cache of predictions in front of the deployment
+@st.cache_resource
+def load_watsonx_client():
+    from watsonx_client import WatsonxClient, default_result_cache
+
+    return WatsonxClient(API_KEY, cache=default_result_cache())
+
+# Append-only audit trail of every prediction, written by a background thread
+# (SALARY_AUDIT=0 turns it off; audit_log.py scans it for drift)
+@st.cache_resource
+def load_audit_log():
+    from audit_log import AuditLog
+
+    return AuditLog(app="enhanced_salary_app.py")
+
+# Shared across sessions so repeated Watsonx failures stop everyone calling it
+@st.cache_resource
+def load_circuit_breaker():
+    return CircuitBreaker()
 
-    data["Position"] = data["Position"].replace(position_mapping)
-    data["Department"] = data["Department"].replace(department_mapping)
+# Salary percentiles per Position × Department × Country, built from
+# employee_records.csv once and topped up with any rows appended since
+@st.cache_resource
+def load_salary_index():
+    from salary_index import load_or_build
+
+    return load_or_build()
+
+# Per-feature explanations of local predictions, shared by all sessions and
+# keyed by normalized input and model version
+@st.cache_resource
+def load_explanation_cache():
+    from explain import default_explanation_cache
+
+    return default_explanation_cache()
+
+# One Prometheus exporter per process, however many sessions run the script
+@st.cache_resource(show_spinner=False)
+def start_metrics_exporter():
+    return metrics.start_exporter(int(METRICS_PORT))
+
+if metrics.enabled and METRICS_PORT:
+    start_metrics_exporter()
+
+# This session's latest request of each kind, as timed by metrics.request()
+def request_timings():
+    return st.session_state.setdefault("request_timings", {})
+
+# Stage breakdown of this session's last local and Watsonx prediction
+def show_debug_panel():
+    with st.expander("🛠️ Debug: last request timings"):
+        for kind in ("local", "watsonx"):
+            table = metrics.breakdown_markdown(kind, request_timings().get(kind))
+            if table:
+                st.markdown(table)
+
+def predict_local_batch(data):
+    from jobl import predict_batch
+
+    model, scaler, label_encoders, _, _ = load_local_model()
+    return predict_batch(data, model, scaler, label_encoders)
+
+# Swept input -> (label, values it takes in the UI)
+SWEEP_AXES = {
+    "YearsExperience": ("Years of Experience", range(0, 41)),
+    "Age": ("Age", range(18, 66)),
+}
 
-    for col in label_encoders:
-        if col in data.columns:
-            le = label_encoders[col]
-            if data[col].iloc[0] not in le.classes_:
-                return None, f"❌ Unknown label '{data[col].iloc[0]}' in column '{col}'"
-            data[col] = le.transform(data[col])
+# The whole curve for one profile in a single batched model call; cached per
+# profile, so moving the other slider or rerunning the script reuses it.
+# model_version is part of the key, so a swapped-in model never reuses old curves
+@st.cache_data(show_spinner=False, max_entries=256)
+def sweep_profile(axis, profile, model_version):
+    import pandas as pd
 
-    scaled_data = scaler.transform(data)
-    pred = model.predict(scaled_data)
-    return pred[0], None
+    values = list(SWEEP_AXES[axis][1])
+    data = pd.DataFrame([dict(profile, **{axis: v}) for v in values])
+    predictions, error_mask, errors = predict_local_batch(data)
+    if error_mask.all():
+        return None, errors[0]
+    return pd.DataFrame({axis: values, "Predicted_Salary": predictions})[~error_mask], None
 
-def predict_watsonx(data):
+def predict_local(record):
+    from jobl import predict_one
+
+    with metrics.request("local") as timing:
+        request_timings()["local"] = timing
+        with metrics.stage("load_model"):
+            version, (model, _, _, fast, grid) = load_live_model().get()
+        # Which model answered, shown under the result
+        st.session_state["local_model_version"] = version
+        return predict_one(record, model, fast, grid)
+
+# Prediction and its per-feature contributions from one model version
+def explain_local(record):
+    from explain import explain_one
+
+    with metrics.request("local") as timing:
+        request_timings()["local"] = timing
+        with metrics.stage("load_model"):
+            version, (model, _, _, fast, _) = load_live_model().get()
+        st.session_state["local_model_version"] = version
+        return explain_one(record, model, fast, load_explanation_cache(), version)
+
+def predict_watsonx(data, client=None, timings=None):
     if not API_KEY:
         return None, "❌ API key not found. Set it in .env with WATSON_API_KEY"
 
-    token_response = requests.post(
-        'https://iam.cloud.ibm.com/identity/token',
-        data={"apikey": API_KEY, "grant_type": 'urn:ibm:params:oauth:grant-type:apikey'}
-    )
-    if token_response.status_code != 200:
-        return None, f"❌ Token fetch failed: {token_response.status_code} - {token_response.text}"
-
-    mltoken = token_response.json()["access_token"]
-    header = {'Content-Type': 'application/json', 'Authorization': f'Bearer {mltoken}'}
-
-    payload_scoring = {
-        "input_data": [{
-            "fields": ["Employee_ID", "Employee_Name", "Age", "Country", "Department", "Position", "Joining_Date"],
-            "values": [[
-                "EMP102", "Test User",
-                int(data["Age"].iloc[0]), data["Country"].iloc[0],
-                data["Department"].iloc[0], data["Position"].iloc[0], "2023-01-01"
-            ]]
-        }]
-    }
+    row = [
+        "EMP102", "Test User",
+        int(data["Age"]), data["Country"],
+        data["Department"], data["Position"], "2023-01-01"
+    ]
 
-    response = requests.post(
-        url='https://au-syd.ml.cloud.ibm.com/ml/v4/deployments/23558892-2ba7-4318-a1c3-ad980f07df57/predictions?version=2021-05-01',
-        json=payload_scoring,
-        headers=header
-    )
+    from watsonx_client import WatsonxError
 
     try:
-        result = response.json()
-        prediction = result["predictions"][0]["values"][0][0]
-        return prediction, None
-    except Exception as e:
-        return None, f"❌ Error from Watson API: {e}\n\nRaw Response: {response.text}"
+        with metrics.request("watsonx") as timing:
+            (request_timings() if timings is None else timings)["watsonx"] = timing
+            prediction = (client or load_watsonx_client()).score_one(row)
+    except WatsonxError as e:
+        return None, f"❌ {e}"
+    return prediction, None
 
 
 # ------------------------------
@@ -105,53 +176,140 @@ with st.sidebar:
         "Support Staff", "Marketing Executive", "Consulting Engineer", "Accountant"
     ])
     years_exp = st.slider("⌛ Years of Experience", 0, 40, value=5)
-    mode = st.radio("⚙️ Prediction Method", ["Local Model", "Watsonx API"])
+    mode = st.radio("⚙️ Prediction Method", ["Local Model", "Watsonx API", "Hybrid (Watsonx with local fallback)"])
+    show_explanation = st.checkbox("🧩 Explain local predictions")
     predict_btn = st.button("🔮 Predict Salary")
-
-# Dummy min/max salary ranges
-salary_ranges = {
-    "Software Engineer": (50000, 120000),
-    "Engineer": (45000, 100000),
-    "Senior Developer": (80000, 1800000),
-    "HR Executive": (40000, 700000),
-    "Sales Executive": (35000, 800000),
-    "Support Staff": (25000, 500000),
-    "Marketing Executive": (40000, 850000),
-    "Consulting Engineer": (70000, 1300000),
-    "Accountant": (50000, 950000)
-}
+    sweep = st.selectbox("📊 Sweep", ["Off"] + list(SWEEP_AXES), format_func=lambda a: a if a == "Off" else f"By {SWEEP_AXES[a][0]}")
 
 if predict_btn:
-    user_data = pd.DataFrame([{
+    user_data = {
         "Age": age,
         "Country": country,
         "Department": department,
         "Position": position,
         "YearsExperience": years_exp
-    }])
+    }
 
+    contributions = None
     if mode == "Local Model":
-        prediction, error = predict_local(user_data)
-    else:
+        if show_explanation:
+            prediction, contributions, error = explain_local(user_data)
+        else:
+            prediction, error = predict_local(user_data)
+        backend = "Local Model"
+    elif mode == "Watsonx API":
         prediction, error = predict_watsonx(user_data)
+        backend = "Watsonx API"
+    else:
+        # Resolve the cached client and this session's timings here: the remote call runs off the script thread
+        client, timings = load_watsonx_client(), request_timings()
+        result = hedged_predict(
+            lambda: predict_watsonx(user_data, client, timings),
+            lambda: predict_local(user_data),
+            load_circuit_breaker(),
+            deadline=WATSON_DEADLINE,
+        )
+        prediction, error, backend = result.prediction, result.error, result.backend
+        st.caption(f"⏱️ Answered by {result.backend} in {result.elapsed * 1000:.0f} ms" + (f" — {result.note}" if result.note else ""))
+
+    if audit_log.enabled:
+        version = st.session_state.get("local_model_version") if backend == "Local Model" else None
+        load_audit_log().record(user_data, prediction, error, backend, version)
+
+    if mode != "Local Model" and API_KEY:
+        stats = load_watsonx_client().cache.stats()
+        st.caption(f"🗄️ Watsonx result cache: {stats['hits']} hits / {stats['misses']} misses ({stats['size']} entries)")
 
     if error:
         st.error(error)
     else:
         st.success(f"💰 Predicted Salary: ₹{prediction:,.2f}")
+        if backend == "Local Model":
+            st.caption(f"🧠 Model version {st.session_state['local_model_version']}")
 
-        # Salary trend line chart
-        min_sal, max_sal = salary_ranges.get(position, (500000, 1000000))
-        chart_data = pd.DataFrame({
-            "Label": ["Minimum", "Predicted", "Maximum"],
-            "Salary": [min_sal, prediction, max_sal]
-        })
-
-        st.markdown("### 📈 Where You Stand in Salary Range")
-        chart = alt.Chart(chart_data).mark_line(point=True).encode(
-            x=alt.X("Label", sort=["Minimum", "Predicted", "Maximum"]),
-            y="Salary",
-            color=alt.value("steelblue")
-        ).properties(width=500, height=300)
+        # Salary trend line chart (altair/pandas are only needed once there is a prediction)
+        import altair as alt
+        import pandas as pd
 
-        st.altair_chart(chart, use_container_width=True)
+        stats = load_salary_index().lookup(position, department, country)
+        if stats:
+            labels = ["Minimum", "P10", "Median", "P90", "Maximum"]
+            chart_data = pd.DataFrame({
+                "Label": labels,
+                "Salary": [stats["min"], stats["p10"], stats["median"], stats["p90"], stats["max"]]
+            })
+
+            st.markdown("### 📈 Where You Stand in Salary Range")
+            distribution = alt.Chart(chart_data).mark_line(point=True).encode(
+                x=alt.X("Label", sort=labels),
+                y="Salary",
+                color=alt.value("steelblue")
+            )
+            predicted = alt.Chart(pd.DataFrame({"Salary": [prediction]})).mark_rule(
+                color="crimson", strokeDash=[6, 3]
+            ).encode(y="Salary")
+            chart = (distribution + predicted).properties(width=500, height=300)
+
+            st.altair_chart(chart, use_container_width=True)
+            st.caption(f"📊 {stats['count']:,} employees in {stats['group']} — dashed line is your prediction")
+
+        if show_explanation and backend == "Local Model":
+            if contributions is None:
+                # Hybrid mode fell back to the local model; the explanation is one more (cached) call
+                _, contributions, explain_error = explain_local(user_data)
+                if explain_error:
+                    st.warning(explain_error)
+            if contributions:
+                from explain import BASE
+
+                # Waterfall: each feature's bar starts where the previous one ended
+                labels = [BASE] + [f"{name} = {user_data[name]}" for name in user_data]
+                values = [contributions[BASE]] + [contributions[name] for name in user_data]
+                ends = pd.Series(values).cumsum()
+                explain_data = pd.DataFrame({
+                    "Feature": labels,
+                    "Start": ends - values,
+                    "End": ends,
+                    "Contribution": values,
+                    "Effect": ["Base"] + ["Raises" if v >= 0 else "Lowers" for v in values[1:]],
+                })
+
+                st.markdown("### 🧩 Why This Salary")
+                bars = alt.Chart(explain_data).mark_bar().encode(
+                    x=alt.X("Feature", sort=labels, title=None),
+                    y=alt.Y("Start", title="Salary (₹)", scale=alt.Scale(zero=False)),
+                    y2="End",
+                    color=alt.Color("Effect", scale=alt.Scale(domain=["Base", "Raises", "Lowers"],
+                                                              range=["steelblue", "seagreen", "crimson"])),
+                    tooltip=["Feature", alt.Tooltip("Contribution", format=",.0f")],
+                )
+                st.altair_chart(bars.properties(width=500, height=300), use_container_width=True)
+                st.caption("Feature contributions (TreeSHAP) from the model that made the prediction; "
+                           "they add up from the base value to the predicted salary.")
+
+    if metrics.enabled:
+        show_debug_panel()
+
+# Sensitivity sweep: the current profile across every value of one input (local model)
+if sweep != "Off":
+    import altair as alt
+
+    label, _ = SWEEP_AXES[sweep]
+    profile = {"Age": age, "Country": country, "Department": department, "Position": position, "YearsExperience": years_exp}
+    current = profile.pop(sweep)
+    curve, error = sweep_profile(sweep, tuple(sorted(profile.items())), load_live_model().get()[0])
+
+    st.markdown(f"### 📊 Predicted Salary by {label}")
+    if error:
+        st.error(error)
+    else:
+        line = alt.Chart(curve).mark_line().encode(
+            x=alt.X(sweep, title=label),
+            y=alt.Y("Predicted_Salary", title="Predicted Salary (₹)"),
+            color=alt.value("steelblue")
+        )
+        marker = alt.Chart(curve[curve[sweep] == current]).mark_point(size=80, filled=True, color="crimson").encode(
+            x=sweep, y="Predicted_Salary"
+        )
+        st.altair_chart((line + marker).properties(width=500, height=300), use_container_width=True)
+        st.caption(f"Local model, one batched call for all {len(curve)} values; the red point is the current {label.lower()}.")
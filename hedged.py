@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+# Remote calls run here so a slow Watsonx request never blocks the Streamlit run
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedged-remote")
+
+HedgedResult = namedtuple("HedgedResult", ["prediction", "error", "backend", "elapsed", "note"])
+
+
+class CircuitBreaker:
+    # closed: remote is tried; open: remote is skipped until reset_timeout has
+    # passed; half_open: a single probe call decides whether to close again
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+def hedged_predict(remote, local, breaker, deadline=1.5):
+    # remote/local are zero-argument callables returning (prediction, error)
+    start = time.perf_counter()
+
+    def fallback(note):
+        prediction, error = local()
+        return HedgedResult(prediction, error, "Local Model", time.perf_counter() - start, note)
+
+    if not breaker.allow():
+        return fallback("Watsonx skipped: circuit open")
+
+    future = _executor.submit(remote)
+    try:
+        prediction, error = future.result(timeout=deadline)
+    except TimeoutError:
+        breaker.record_failure()
+        return fallback(f"Watsonx missed the {deadline * 1000:.0f} ms deadline")
+    except Exception as e:
+        breaker.record_failure()
+        return fallback(f"Watsonx failed: {e}")
+
+    if error:
+        breaker.record_failure()
+        return fallback(f"Watsonx failed: {error}")
+
+    breaker.record_success()
+    return HedgedResult(prediction, None, "Watsonx API", time.perf_counter() - start, None)
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+from model_bundle import BUNDLE_DIR, bundle_exists, read_manifest
+
+# Seconds between checks for a retrained model (0 = never reload)
+RELOAD_INTERVAL = float(os.getenv("SALARY_RELOAD_INTERVAL", "2"))
+
+# Known-good inputs a new model must score before it is swapped in
+WARMUP_RECORDS = [
+    {"Age": 30, "Country": "India", "Department": "IT", "Position": "Software Engineer", "YearsExperience": 5},
+    {"Age": 45, "Country": "USA", "Department": "HR", "Position": "HR Executive", "YearsExperience": 20},
+    {"Age": 26, "Country": "UK", "Department": "Business", "Position": "Accountant", "YearsExperience": 2},
+]
+
+
+def current_version(bundle_path=BUNDLE_DIR):
+    # The bundle's model_version; without a bundle, the pickles' newest modification time
+    if bundle_exists(bundle_path):
+        return read_manifest(bundle_path)["model_version"]
+    from jobl import ENCODERS_PATH, MODEL_PATH, SCALER_PATH
+
+    stamps = [os.stat(path).st_mtime_ns for path in (MODEL_PATH, SCALER_PATH, ENCODERS_PATH) if os.path.exists(path)]
+    return f"pickles-{max(stamps) // 1_000_000_000}" if stamps else None
+
+
+def warm_batch(model, scaler, label_encoders):
+    # First predictions on a new model; refuses it if known-good rows do not score
+    import numpy as np
+    import pandas as pd
+    from jobl import predict_batch
+
+    predictions, error_mask, errors = predict_batch(pd.DataFrame(WARMUP_RECORDS), model, scaler, label_encoders)
+    if error_mask.any() or not np.isfinite(predictions).all():
+        raise ValueError(f"warm-up predictions failed: {[e for e in errors if e] or predictions.tolist()}")
+
+
+def load_serving_artifacts(engine="xgboost"):
+    # What the apps serve from: (model, scaler, label_encoders, fast, grid)
+    from jobl import FastPreprocessor, load_artifacts
+    from prediction_grid import load_grid
+
+    # Versioned bundle (native booster + plain arrays, checksummed); falls back to the pickles
+    model, scaler, label_encoders = load_artifacts(engine=engine)
+    # Precompile mappings, vocabularies and scaling for the single-row path
+    fast = FastPreprocessor(scaler, label_encoders)
+    # Memory-mapped table of every UI input combination (None until prediction_grid.py is run,
+    # and for any model the grid was not built from)
+    grid = load_grid(label_encoders)
+    return model, scaler, label_encoders, fast, grid
+
+
+def warm_serving_artifacts(artifacts):
+    from jobl import predict_one
+
+    model, scaler, label_encoders, fast, _ = artifacts
+    warm_batch(model, scaler, label_encoders)
+    for record in WARMUP_RECORDS:
+        predict_one(record, model, fast)
+
+
+class LiveModel:
+    # The serving artifacts and the version they came from, held as one
+    # (version, artifacts) tuple. check() loads and warms a new version to the
+    # side, then replaces the tuple in a single assignment: a request that has
+    # already called get() finishes on the version it started with, and no
+    # request ever waits for a reload.
+
+    def __init__(self, load, warm=None, version=current_version):
+        self._load = load
+        self._warm = warm
+        self._version = version
+        self.current = None
+        self.error = None
+        self.reloads = 0
+        # A version that failed to load is not retried until the files change again
+        self._failed = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        # (version, artifacts); loads on the calling thread the first time only
+        while self.current is None:
+            self.check()
+        return self.current
+
+    def check(self):
+        # Returns True when a new version was swapped in
+        with self._lock:
+            version = self._version()
+            if self.current is not None and version in (self.current[0], self._failed):
+                return False
+            try:
+                artifacts = self._load()
+                if self._warm:
+                    self._warm(artifacts)
+            except Exception as e:
+                if self.current is None:
+                    raise
+                self._failed = version
+                self.error = f"{type(e).__name__}: {e}"
+                print(f"⚠️ Model {version} failed to load; still serving {self.current[0]}: {self.error}")
+                return False
+            if self._version() != version:
+                # Replaced again while loading; the next check picks up the newest
+                return False
+
+            previous = self.current
+            self.current = (version, artifacts)
+            self.error = None
+            if previous is not None:
+                self.reloads += 1
+                print(f"🔄 Swapped model {previous[0]} → {version}")
+            return True
+
+    def watch(self, interval=RELOAD_INTERVAL):
+        # Polls from a daemon thread; returns self so it can end a cached loader
+        if interval <= 0:
+            return self
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check()
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+
+        threading.Thread(target=run, daemon=True, name="model-watcher").start()
+        return self
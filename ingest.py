@@ -0,0 +1,278 @@
+import csv
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from sklearn.preprocessing import LabelEncoder
+
+from jobl import DEPARTMENT_MAPPING, FEATURES, POSITION_MAPPING
+from model_bundle import file_sha256
+
+CACHE_DIR = ".feature_cache"
+# Bump when the cleaning/encoding below changes so old caches are not reused
+PREPROCESS_VERSION = 1
+
+CATEGORICAL = ["Country", "Department", "Position"]
+TARGET = "Salary"
+
+# Employee_ID / Employee_Name are never used for training, so they are not even parsed
+USECOLS = ["Age", "Country", "Department", "Position", "Salary", "Joining_Date"]
+DTYPES = {
+    "Age": "float32",
+    "Country": "category",
+    "Department": "category",
+    "Position": "category",
+    "Salary": "float64",
+    "Joining_Date": "string",
+}
+
+
+def _map_categories(column, mapping):
+    # Map aliases on the (few) category labels instead of on every row
+    mapped = pd.Index([mapping.get(c, c) for c in column.cat.categories])
+    categories = mapped.unique().sort_values()
+    lookup = categories.get_indexer(mapped)
+    codes = column.cat.codes.to_numpy()
+    return pd.Categorical.from_codes(np.where(codes < 0, -1, lookup[codes]), categories=categories)
+
+
+def clean_chunk(df, year=None):
+    year = year or datetime.now().year
+
+    # === Extract YearsExperience ===
+    joining = pd.to_datetime(df["Joining_Date"], format="%Y-%m-%d", errors="coerce")
+    df = df.drop(columns=["Joining_Date"])
+    df["YearsExperience"] = (year - joining.dt.year).astype("float32")
+
+    # === Normalize categorical values ===
+    df["Position"] = _map_categories(df["Position"], POSITION_MAPPING)
+    df["Department"] = _map_categories(df["Department"], DEPARTMENT_MAPPING)
+
+    # === Drop missing values ===
+    return df.dropna()
+
+
+def read_records(path, chunksize=None, engine=None):
+    # Yields cleaned chunks; the pyarrow engine is multithreaded but reads the file in one go
+    if engine == "pyarrow":
+        yield clean_chunk(pd.read_csv(path, usecols=USECOLS, dtype=DTYPES, engine="pyarrow"))
+        return
+    if chunksize:
+        for chunk in pd.read_csv(path, usecols=USECOLS, dtype=DTYPES, chunksize=chunksize):
+            yield clean_chunk(chunk)
+        return
+    yield clean_chunk(pd.read_csv(path, usecols=USECOLS, dtype=DTYPES))
+
+
+def build_features(path, chunksize=None, engine=None):
+    numeric = {"Age": [], "YearsExperience": [], TARGET: []}
+    categorical = {col: [] for col in CATEGORICAL}
+    for chunk in read_records(path, chunksize=chunksize, engine=engine):
+        for col in numeric:
+            numeric[col].append(chunk[col].to_numpy())
+        for col in CATEGORICAL:
+            categorical[col].append(pd.Categorical(chunk[col]))
+
+    # === Encode categoricals ===
+    # Sorted categories give the same codes LabelEncoder would
+    X = np.empty((sum(len(a) for a in numeric["Age"]), len(FEATURES)), dtype=np.float32)
+    label_encoders = {}
+    for i, col in enumerate(FEATURES):
+        if col in categorical:
+            combined = union_categoricals(categorical[col], sort_categories=True)
+            combined = combined.remove_unused_categories()
+            X[:, i] = combined.codes
+            le = LabelEncoder()
+            le.classes_ = np.asarray(combined.categories, dtype=object)
+            label_encoders[col] = le
+        else:
+            X[:, i] = np.concatenate(numeric[col])
+    y = np.concatenate(numeric[TARGET])
+    return X, y, label_encoders
+
+
+# Only the prefix is hashed to tell an appended file from a rewritten one
+HEAD_BYTES = 1 << 16
+
+
+def _head_sha256(path, size):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read(min(size, HEAD_BYTES))).hexdigest()
+
+
+def read_header(path):
+    # Column names, quoted or not (pyarrow's CSV writer quotes every field)
+    with open(path, newline="") as f:
+        return next(csv.reader(f))
+
+
+def complete_size(path):
+    # Bytes up to and including the last newline; a writer may be partway through the line after it
+    end = os.path.getsize(path)
+    with open(path, "rb") as f:
+        while end > 0:
+            start = max(0, end - HEAD_BYTES)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+def source_state(path, offset=None):
+    # Taken before the file is read; the next incremental run reads from "offset" on
+    offset = complete_size(path) if offset is None else offset
+    return {
+        "path": os.path.abspath(path),
+        "offset": offset,
+        "head": _head_sha256(path, offset),
+        "year": datetime.now().year,
+    }
+
+
+def appended_since(path, state):
+    # True when `path` is still the file `state` describes, possibly with rows added at the end
+    size = os.path.getsize(path)
+    offset = state.get("offset", 0)
+    if state.get("path") != os.path.abspath(path) or not 0 < offset <= size:
+        return False
+    with open(path, "rb") as f:
+        f.seek(offset - 1)
+        # A last line without a newline may have been extended rather than followed
+        if f.read(1) != b"\n":
+            return False
+    return state.get("head") == _head_sha256(path, offset)
+
+
+class _FileSlice:
+    # Read-only view of a file that ends at byte `end`, for pandas
+    def __init__(self, f, end):
+        self.f = f
+        self.end = end
+
+    def read(self, size=-1):
+        left = max(self.end - self.f.tell(), 0)
+        return self.f.read(left if size is None or size < 0 else min(size, left))
+
+    def __iter__(self):
+        return iter(self.read().splitlines(keepends=True))
+
+
+def read_csv_range(path, start, end, usecols, chunksize=200_000, dtype=None):
+    # Chunks of the rows in bytes [start, end) of a CSV, named after its header.
+    # end should come from complete_size(), so a half-written line is never parsed
+    names = read_header(path)
+    with open(path, "rb") as f:
+        f.readline()
+        start = max(start, f.tell())
+        if start >= end:
+            return
+        f.seek(start)
+        yield from pd.read_csv(_FileSlice(f, end), names=names, header=None, usecols=usecols, dtype=dtype,
+                               chunksize=chunksize)
+
+
+def _read_rows(path, start, end, chunksize):
+    chunks = [clean_chunk(chunk) for chunk in read_csv_range(path, start, end, USECOLS, chunksize, DTYPES)]
+    if not chunks:
+        return clean_chunk(pd.DataFrame({col: pd.Series(dtype=DTYPES[col]) for col in USECOLS}))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_appended(path, offset, chunksize=200_000):
+    # Cleaned rows in the complete lines after byte `offset`, and the offset they end at
+    end = max(complete_size(path), offset)
+    return _read_rows(path, offset, end, chunksize), end
+
+
+def read_preceding(path, offset, size, chunksize=200_000):
+    # Cleaned rows in the complete lines within the `size` bytes before byte `offset`
+    start = max(offset - size, 0)
+    if start:
+        with open(path, "rb") as f:
+            # Skip the rest of the line `start` falls in
+            f.seek(start - 1)
+            f.readline()
+            start = f.tell()
+    return _read_rows(path, start, offset, chunksize)
+
+
+def _cache_key(path):
+    key = {
+        "source": file_sha256(path),
+        # YearsExperience is relative to the current year
+        "year": datetime.now().year,
+        "version": PREPROCESS_VERSION,
+        "mappings": [POSITION_MAPPING, DEPARTMENT_MAPPING],
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _save_cache(cache_path, X, y, label_encoders, source):
+    tmp = cache_path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "X.npy"), X)
+    np.save(os.path.join(tmp, "y.npy"), y)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({
+            "source": os.path.abspath(source),
+            "features": FEATURES,
+            "classes": {col: [str(c) for c in le.classes_] for col, le in label_encoders.items()},
+        }, f)
+    shutil.rmtree(cache_path, ignore_errors=True)
+    os.replace(tmp, cache_path)
+
+
+def _prune_cache(cache_dir, keep, source):
+    # Entries for earlier versions of the same source file are never read again; without
+    # this every append to a large CSV would leave another full copy of X and y behind.
+    # Entries for other files stay, so alternating between datasets keeps both cached
+    source = os.path.abspath(source)
+    for name in os.listdir(cache_dir):
+        entry = os.path.join(cache_dir, name)
+        if entry == keep or name.endswith(".tmp"):
+            continue
+        try:
+            with open(os.path.join(entry, "meta.json")) as f:
+                entry_source = json.load(f).get("source")
+        except (OSError, ValueError):
+            continue
+        if entry_source == source:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def _load_cache(cache_path, mmap_mode=None):
+    X = np.load(os.path.join(cache_path, "X.npy"), mmap_mode=mmap_mode)
+    y = np.load(os.path.join(cache_path, "y.npy"), mmap_mode=mmap_mode)
+    with open(os.path.join(cache_path, "meta.json")) as f:
+        meta = json.load(f)
+    label_encoders = {}
+    for col, classes in meta["classes"].items():
+        le = LabelEncoder()
+        le.classes_ = np.asarray(classes, dtype=object)
+        label_encoders[col] = le
+    return X, y, label_encoders
+
+
+def load_training_data(path="employee_records.csv", cache_dir=CACHE_DIR, chunksize=None, engine=None,
+                       use_cache=True, mmap_mode=None):
+    # Returns (X float32 array in FEATURES order, y, label_encoders, from_cache); the
+    # encoded matrix is cached under cache_dir and reused until the source file changes
+    if not use_cache:
+        return build_features(path, chunksize=chunksize, engine=engine) + (False,)
+
+    cache_path = os.path.join(cache_dir, _cache_key(path))
+    if os.path.exists(os.path.join(cache_path, "meta.json")):
+        return _load_cache(cache_path, mmap_mode=mmap_mode) + (True,)
+
+    X, y, label_encoders = build_features(path, chunksize=chunksize, engine=engine)
+    _save_cache(cache_path, X, y, label_encoders, path)
+    _prune_cache(cache_dir, cache_path, path)
+    return X, y, label_encoders, False
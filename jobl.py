@@ -1,71 +1,357 @@
-import joblib
+import argparse
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
 import pandas as pd
 import numpy as np
 
-try:
-    # 1. Load model and preprocessing tools
-    model = joblib.load("salary_model_clean.pkl")
-    scaler = joblib.load("scaler_clean.pkl")
-    label_encoders = joblib.load("label_encoders_clean.pkl")
-    print("✅ Model and preprocessors loaded.")
-
-    # 2. Input new employee data — use raw/unmapped input (we’ll map in code)
-    new_data = pd.DataFrame([{
-        'Age': 30,
-        'Country': 'India',
-        'Department': 'IT',                # Raw input
-        'Position': 'Software Engineer',  # Raw input
-        'YearsExperience': 5
-    }])
-    print("📥 Input:")
-    print(new_data)
-
-    # 3. Normalize raw categorical inputs to match model training
-    position_mapping = {
-        "Software Engineer": "Developer",
-        "Engineer": "Developer",
-        "Software Developer": "Developer",
-        "Senior Developer": "Developer",
-        "Software Dev": "Developer",
-        "HR Executive": "Executive",
-        "Sales Executive": "Executive",
-        "Support Staff": "Support",
-        "Marketing Executive": "Executive",
-        "Consulting Engineer": "Consultant",
-        
-        "Accountant" : "Analyst",  
-
-    }
-
-    department_mapping = {
-        "Software": "Engineering",
-        "Tech": "Engineering",
-        "Technical": "Engineering",
-        "IT": "Engineering",
-        "People": "HR",
-        "Customer Service": "Support",
-        "Business": "Sales"
-    }
-
-    new_data["Position"] = new_data["Position"].replace(position_mapping)
-    new_data["Department"] = new_data["Department"].replace(department_mapping)
-
-    # 4. Encode categorical columns
-    for col in label_encoders:
-        if col in new_data.columns:
-            le = label_encoders[col]
-            # Handle unknown values
-            unknowns = new_data[~new_data[col].isin(le.classes_)][col].tolist()
-            if unknowns:
-                raise ValueError(f"❌ Unknown label in column '{col}': {unknowns}")
-            new_data[col] = le.transform(new_data[col])
-
-    # 5. Scale numerical values
-    new_data_scaled = scaler.transform(new_data)
-
-    # 6. Predict
-    predicted_salary = model.predict(new_data_scaled)
-    print(f"\n💰 Predicted Salary: ₹{predicted_salary[0]:,.2f}")
-
-except Exception as e:
-    print("❌ Error:", e)
+from metrics import stage
+from model_bundle import BUNDLE_DIR, bundle_exists, load_bundle
+from numpy_trees import TreeEnsemble, export_trees
+
+MODEL_PATH = "salary_model_clean.pkl"
+SCALER_PATH = "scaler_clean.pkl"
+ENCODERS_PATH = "label_encoders_clean.pkl"
+
+# Column order the scaler and model were fitted on
+FEATURES = ["Age", "Country", "Department", "Position", "YearsExperience"]
+
+# Normalize raw categorical inputs to match model training
+POSITION_MAPPING = {
+    "Software Engineer": "Developer",
+    "Engineer": "Developer",
+    "Software Developer": "Developer",
+    "Senior Developer": "Developer",
+    "Software Dev": "Developer",
+    "HR Executive": "Executive",
+    "Sales Executive": "Executive",
+    "Support Staff": "Support",
+    "Marketing Executive": "Executive",
+    "Consulting Engineer": "Consultant",
+    "Accountant": "Analyst",
+}
+
+DEPARTMENT_MAPPING = {
+    "Software": "Engineering",
+    "Tech": "Engineering",
+    "Technical": "Engineering",
+    "IT": "Engineering",
+    "People": "HR",
+    "Customer Service": "Support",
+    "Business": "Sales"
+}
+
+
+def load_artifacts(bundle_path=BUNDLE_DIR, engine="xgboost"):
+    # Prefer the checksummed bundle; the legacy pickles are only a fallback.
+    # engine="numpy" serves the model through numpy_trees.TreeEnsemble instead of xgboost.
+    if bundle_exists(bundle_path):
+        model, scaler, label_encoders, _ = load_bundle(bundle_path, engine=engine)
+        return model, scaler, label_encoders
+    import joblib
+
+    model = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+    label_encoders = joblib.load(ENCODERS_PATH)
+    if engine == "numpy":
+        model = TreeEnsemble(export_trees(model.get_booster()))
+    return model, scaler, label_encoders
+
+
+def encode_features(data, label_encoders):
+    # Raw records (employee_records.csv) carry Joining_Date instead of YearsExperience
+    if "YearsExperience" not in data.columns:
+        joining = pd.to_datetime(data["Joining_Date"], errors="coerce")
+        data = data.assign(YearsExperience=datetime.now().year - joining.dt.year)
+
+    with stage("mapping"):
+        features = data[FEATURES].copy()
+        features["Position"] = features["Position"].replace(POSITION_MAPPING)
+        features["Department"] = features["Department"].replace(DEPARTMENT_MAPPING)
+
+    # Rows that cannot be scored are flagged instead of failing the whole batch;
+    # each row keeps the message of the first problem found
+    error_mask = np.zeros(len(features), dtype=bool)
+    errors = np.full(len(features), None, dtype=object)
+
+    def flag(bad, messages):
+        new = bad & ~error_mask
+        errors[new] = messages[new]
+        error_mask[new] = True
+
+    # Encode categorical columns with one vectorized vocabulary lookup each
+    with stage("encoding"):
+        for col in label_encoders:
+            if col in features.columns:
+                le = label_encoders[col]
+                codes = pd.Categorical(features[col], categories=le.classes_).codes
+                raw = features[col].astype(str)
+                flag(codes < 0, ("❌ Unknown label '" + raw + f"' in column '{col}'").to_numpy())
+                features[col] = codes
+
+    for col in ["Age", "YearsExperience"]:
+        flag(features[col].isna().to_numpy(), np.full(len(features), f"❌ Missing value in column '{col}'", dtype=object))
+
+    return features, error_mask, errors
+
+
+def predict_batch(data, model, scaler, label_encoders):
+    features, error_mask, errors = encode_features(data, label_encoders)
+
+    predictions = np.full(len(features), np.nan, dtype=np.float32)
+    valid = ~error_mask
+    if valid.any():
+        # Scale numerical values and predict every valid row in one call
+        with stage("scaling"):
+            scaled = scaler.transform(features[valid])
+        with stage("model_predict"):
+            predictions[valid] = model.predict(scaled)
+    return predictions, error_mask, errors
+
+
+# ------------------------------
+# Single-row fast path
+# ------------------------------
+class FastPreprocessor:
+    # Mappings, encoder vocabularies and scaler mean/scale folded into one
+    # lookup table per categorical column, built once at load time.
+    # transform() must stay bit-identical to encode_features + scaler.transform.
+
+    def __init__(self, scaler, label_encoders):
+        n = len(FEATURES)
+        mean = scaler.mean_ if getattr(scaler, "mean_", None) is not None else np.zeros(n)
+        scale = scaler.scale_ if getattr(scaler, "scale_", None) is not None else np.ones(n)
+        self.mean = [float(m) for m in mean]
+        self.scale = [float(s) for s in scale]
+
+        aliases = {"Department": DEPARTMENT_MAPPING, "Position": POSITION_MAPPING}
+        self.columns = []
+        for i, col in enumerate(FEATURES):
+            if col not in label_encoders:
+                continue
+            mapping = aliases.get(col, {})
+            classes = label_encoders[col].classes_
+            scaled = {label: (code - self.mean[i]) / self.scale[i] for code, label in enumerate(classes)}
+            table = dict(scaled)
+            for raw, mapped in mapping.items():
+                if mapped in scaled:
+                    table[raw] = scaled[mapped]
+                else:
+                    table.pop(raw, None)
+            self.columns.append((i, col, table, mapping))
+
+        self.numeric = [(i, col) for i, col in enumerate(FEATURES) if col not in label_encoders]
+        self._local = threading.local()
+
+    def _buffer(self):
+        # One preallocated row per thread (Streamlit serves sessions on threads)
+        buf = getattr(self._local, "row", None)
+        if buf is None:
+            buf = self._local.row = np.empty((1, len(FEATURES)))
+        return buf
+
+    def transform(self, record):
+        row = self._buffer()
+        for i, col, table, mapping in self.columns:
+            raw = record[col]
+            value = table.get(raw)
+            if value is None:
+                return None, f"❌ Unknown label '{mapping.get(raw, raw)}' in column '{col}'"
+            row[0, i] = value
+        for i, col in self.numeric:
+            value = record[col]
+            # Flagged like encode_features does, instead of predicting from a NaN
+            if value is None or value != value:
+                return None, f"❌ Missing value in column '{col}'"
+            row[0, i] = (value - self.mean[i]) / self.scale[i]
+        return row, None
+
+
+def predict_one(record, model, fast, grid=None):
+    # Precomputed grid first (see prediction_grid.py), model only for inputs outside it
+    if grid is not None:
+        with stage("grid_lookup"):
+            prediction = grid.lookup(record)
+        if prediction is not None:
+            return prediction, None
+
+    # Mapping, encoding and scaling are one fused table lookup here
+    with stage("preprocess"):
+        row, error = fast.transform(record)
+    if error:
+        return None, error
+    with stage("model_predict"):
+        return model.predict(row)[0], None
+
+
+# ------------------------------
+# Batch scoring (streamed CSV in, CSV out)
+# ------------------------------
+_worker_artifacts = None
+
+
+def _init_worker(engine):
+    global _worker_artifacts
+    _worker_artifacts = load_artifacts(engine=engine)
+
+
+def _score_in_worker(chunk, explain):
+    return score_chunk(chunk, *_worker_artifacts, explain=explain)
+
+
+def score_chunk(chunk, model, scaler, label_encoders, explain=False):
+    # predict_batch's (predictions, error_mask, errors), plus a frame of per-feature
+    # contributions when explain is set (xgboost engine only, see explain.py)
+    if not explain:
+        return predict_batch(chunk, model, scaler, label_encoders)
+    from explain import BASE, explain_batch
+
+    predictions, contribs, error_mask, errors = explain_batch(chunk, model, scaler, label_encoders)
+    contribs = contribs.rename(columns=lambda col: "Contribution_Base" if col == BASE else f"Contribution_{col}")
+    return predictions, error_mask, errors, contribs
+
+
+def remote_values(chunk):
+    # Rows in the field order of the Watsonx deployment; dummies for fields the input lacks
+    from watsonx_client import SCORING_FIELDS
+
+    rows = pd.DataFrame(index=chunk.index)
+    for field in SCORING_FIELDS:
+        if field in chunk.columns:
+            rows[field] = chunk[field]
+        elif field == "Joining_Date" and "YearsExperience" in chunk.columns:
+            rows[field] = (datetime.now().year - chunk["YearsExperience"]).astype(str) + "-01-01"
+        else:
+            rows[field] = {"Employee_ID": "EMP102", "Employee_Name": "Test User", "Joining_Date": "2023-01-01"}[field]
+    rows["Age"] = rows["Age"].astype(int)
+    return rows.astype(object).values.tolist()
+
+
+def predict_batch_remote(chunk, client, batch_size=500, concurrency=4):
+    predictions, errors = client.score_rows(remote_values(chunk), batch_size=batch_size, concurrency=concurrency)
+    errors = np.array(errors, dtype=object)
+    error_mask = np.array([e is not None for e in errors], dtype=bool)
+    predictions = np.array([np.nan if p is None else p for p in predictions], dtype=np.float64)
+    return predictions, error_mask, errors
+
+
+def _output_frame(chunk, scored):
+    predictions, error_mask, errors = scored[:3]
+    out = pd.DataFrame({"Predicted_Salary": predictions, "Error": errors}, index=chunk.index)
+    if "Employee_ID" in chunk.columns:
+        out.insert(0, "Employee_ID", chunk["Employee_ID"])
+    if len(scored) > 3:
+        out = out.join(scored[3])
+    return out
+
+
+def score_csv(input_path, output_path, chunksize=50_000, workers=0, remote=None, engine="xgboost", explain=False):
+    reader = pd.read_csv(input_path, chunksize=chunksize)
+    rows = 0
+    header = True
+
+    with open(output_path, "w", newline="") as out:
+        def write(chunk, scored):
+            nonlocal rows, header
+            _output_frame(chunk, scored).to_csv(out, header=header, index=False)
+            header = False
+            rows += len(chunk)
+
+        if remote is not None:
+            # Watsonx: each chunk is split into concurrent scoring requests
+            for chunk in reader:
+                write(chunk, predict_batch_remote(chunk, **remote))
+        elif workers and workers > 1:
+            # Keep at most 2 chunks per worker in flight so memory stays flat
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine,)) as pool:
+                pending = deque()
+                for chunk in reader:
+                    pending.append((chunk, pool.submit(_score_in_worker, chunk, explain)))
+                    if len(pending) >= workers * 2:
+                        chunk, future = pending.popleft()
+                        write(chunk, future.result())
+                while pending:
+                    chunk, future = pending.popleft()
+                    write(chunk, future.result())
+        else:
+            model, scaler, label_encoders = load_artifacts(engine=engine)
+            for chunk in reader:
+                write(chunk, score_chunk(chunk, model, scaler, label_encoders, explain))
+
+    return rows
+
+
+def demo(engine="xgboost"):
+    try:
+        # 1. Load model and preprocessing tools
+        model, scaler, label_encoders = load_artifacts(engine=engine)
+        print("✅ Model and preprocessors loaded.")
+
+        # 2. Input new employee data — use raw/unmapped input (we’ll map in code)
+        new_data = pd.DataFrame([{
+            'Age': 30,
+            'Country': 'India',
+            'Department': 'IT',                # Raw input
+            'Position': 'Software Engineer',  # Raw input
+            'YearsExperience': 5
+        }])
+        print("📥 Input:")
+        print(new_data)
+
+        # 3-6. Normalize, encode, scale and predict
+        predicted_salary, error_mask, errors = predict_batch(new_data, model, scaler, label_encoders)
+        if error_mask[0]:
+            raise ValueError(errors[0])
+        print(f"\n💰 Predicted Salary: ₹{predicted_salary[0]:,.2f}")
+
+    except Exception as e:
+        print("❌ Error:", e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score employees with the local salary model.")
+    parser.add_argument("--input", help="CSV shaped like employee_records.csv (omit to run the single-row demo)")
+    parser.add_argument("--output", default="predictions.csv", help="Where to write predictions")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="Rows read and scored per chunk")
+    parser.add_argument("--workers", type=int, default=0, help="Spread chunks across this many processes")
+    parser.add_argument("--backend", choices=["local", "watsonx"], default="local", help="Score locally or on the Watsonx deployment")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per Watsonx scoring request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Watsonx scoring requests in flight at once")
+    parser.add_argument("--engine", choices=["xgboost", "numpy"], default="xgboost",
+                        help="Local model runtime; numpy evaluates the exported trees without loading xgboost")
+    parser.add_argument("--explain", action="store_true", help="Add per-feature TreeSHAP contribution columns (local xgboost only)")
+    args = parser.parse_args()
+
+    if not args.input:
+        demo(args.engine)
+        return
+    if args.explain and (args.backend != "local" or args.engine != "xgboost"):
+        print("❌ --explain needs the local backend with the xgboost engine")
+        return
+
+    remote = None
+    if args.backend == "watsonx":
+        from dotenv import load_dotenv
+        from watsonx_client import WatsonxClient
+
+        load_dotenv()
+        api_key = os.getenv("WATSON_API_KEY")
+        if not api_key:
+            print("❌ API key not found. Set it in a .env file with key: WATSON_API_KEY")
+            return
+        client = WatsonxClient(api_key, pool_size=args.concurrency)
+        remote = {"client": client, "batch_size": args.batch_size, "concurrency": args.concurrency}
+
+    start = time.perf_counter()
+    rows = score_csv(args.input, args.output, chunksize=args.chunksize, workers=args.workers, remote=remote,
+                     engine=args.engine, explain=args.explain)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Scored {rows:,} rows in {elapsed:.2f}s → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
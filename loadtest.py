@@ -0,0 +1,87 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+import requests
+
+from bench import ui_records
+
+# Drives serve.py with concurrent keep-alive clients:
+#   python serve.py --port 8600 &
+#   python loadtest.py --url http://127.0.0.1:8600 --concurrency 32
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/readyz", timeout=2).status_code == 200:
+                return True
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def run_client(url, payloads, latencies, failures):
+    session = requests.Session()
+    for payload in payloads:
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{url}/predict", json=payload, timeout=30)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            failures.append(1)
+    session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the prediction service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8600")
+    parser.add_argument("--requests", type=int, default=5000, help="Total requests sent")
+    parser.add_argument("--concurrency", type=int, default=16, help="Parallel keep-alive clients")
+    parser.add_argument("--rows", type=int, default=1, help="Records per request")
+    args = parser.parse_args()
+
+    if not wait_ready(args.url):
+        raise SystemExit(f"❌ {args.url} did not become ready")
+    before = requests.get(f"{args.url}/healthz").json()
+
+    records = ui_records(args.requests * args.rows)
+    payloads = [{"records": records[i * args.rows:(i + 1) * args.rows]} for i in range(args.requests)]
+    latencies, failures = [], []
+    threads = [
+        threading.Thread(target=run_client, args=(args.url, payloads[i::args.concurrency], latencies, failures))
+        for i in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    try:
+        after = requests.get(f"{args.url}/healthz", timeout=5).json()
+    except requests.RequestException:
+        after = {}
+    ms = np.asarray(latencies) * 1000
+    # Batch counters are per process, so they only add up when both reads hit the same one
+    same_process = after.get("pid") == before.get("pid")
+    batches = after.get("batches", 0) - before.get("batches", 0) if same_process else 0
+    rows = after.get("rows", 0) - before.get("rows", 0)
+    print(f"📊 {args.requests:,} requests × {args.rows} rows, {args.concurrency} clients in {elapsed:.2f}s")
+    print(f"   throughput  {args.requests / elapsed:,.0f} req/s ({args.requests * args.rows / elapsed:,.0f} rows/s)")
+    print(f"   latency     p50 {np.percentile(ms, 50):.2f} ms · p99 {np.percentile(ms, 99):.2f} ms")
+    if batches:
+        print(f"   batching    {rows / batches:.1f} rows per model call ({batches:,} calls)")
+    if failures:
+        print(f"❌ {len(failures):,} failed requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Off unless SALARY_METRICS=1; when off, stage() hands back one shared no-op object
+enabled = os.getenv("SALARY_METRICS", "0") == "1"
+
+# Upper bounds in seconds, from a grid lookup (microseconds) to a slow remote call
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class Registry:
+    # Aggregate histograms keyed by (metric name, label value); a single request's
+    # breakdown belongs to whoever made it and is handed back by request()
+
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, label):
+        key = (name, label)
+        hist = self.histograms.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(key, Histogram())
+        return hist
+
+    def clear(self):
+        with self._lock:
+            self.histograms.clear()
+
+
+REGISTRY = Registry()
+_local = threading.local()
+
+# metric name -> (label name, help text)
+METRICS = {
+    "salary_stage_seconds": ("stage", "Time spent in one prediction stage"),
+    "salary_request_seconds": ("kind", "End-to-end prediction time"),
+}
+
+
+class _NoopStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        REGISTRY.histogram("salary_stage_seconds", self.name).observe(elapsed)
+        breakdown = getattr(_local, "breakdown", None)
+        if breakdown is not None:
+            breakdown.append((self.name, elapsed))
+        return False
+
+
+def stage(name):
+    # with stage("scaling"): ...
+    return _Stage(name) if enabled else _NOOP
+
+
+@contextmanager
+def request(kind):
+    # Groups the stages run on this thread into one request's timing, which is yielded:
+    # {"total": seconds (None until the request ends), "stages": [(name, seconds), ...]}
+    if not enabled:
+        yield None
+        return
+    timing = {"total": None, "stages": [], "at": time.time()}
+    _local.breakdown = timing["stages"]
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        elapsed = time.perf_counter() - start
+        _local.breakdown = None
+        REGISTRY.histogram("salary_request_seconds", kind).observe(elapsed)
+        timing["total"] = elapsed
+
+
+def render_prometheus(registry=REGISTRY):
+    # Prometheus text exposition format (version 0.0.4)
+    lines = []
+    for name, (label, help_text) in METRICS.items():
+        series = sorted((value, hist) for (metric, value), hist in list(registry.histograms.items()) if metric == name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for value, hist in series:
+            counts, total, count = hist.snapshot()
+            cumulative = 0
+            for bound, n in zip(hist.buckets, counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{label}="{value}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{{label}="{value}"}} {total}')
+            lines.append(f'{name}_count{{{label}="{value}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_exporter(port=9108, host="0.0.0.0"):
+    # Serves /metrics from a daemon thread; returns the server so callers can shut it down
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-exporter").start()
+    return server
+
+
+def breakdown_markdown(kind, timing):
+    # Markdown table of one request's timing from request(), for the apps' debug panel
+    if timing is None:
+        return None
+    if timing["total"] is None:
+        return f"**{kind}**: still running"
+    rows = "\n".join(f"| {name} | {seconds * 1000:.3f} |" for name, seconds in timing["stages"])
+    return f"**{kind}**: {timing['total'] * 1000:.2f} ms total\n\n| stage | ms |\n|---|---:|\n{rows}"
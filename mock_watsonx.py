@@ -0,0 +1,156 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for IBM IAM + the Watsonx deployment endpoint, for trying the
+# client without credentials or network:
+#   python mock_watsonx.py --port 8555
+#   WATSON_API_KEY=dummy WATSON_IAM_URL=http://127.0.0.1:8555/identity/token \
+#   WATSON_SCORING_BASE_URL=http://127.0.0.1:8555 streamlit run app.py
+
+
+def mock_salary(row):
+    # Deterministic fake prediction so callers can check row order
+    age = row[2] if len(row) > 2 else 30
+    return 30000.0 + 1500.0 * float(age)
+
+
+class MockWatsonxServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, token_ttl=3600, latency=0.0, error_rate=0.0, error_status=503, fail_first=0):
+        super().__init__(address, MockWatsonxHandler)
+        self.token_ttl = token_ttl
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # The next this many authenticated scoring calls fail; deterministic, for tests
+        self.fail_first = fail_first
+        self.lock = threading.Lock()
+        self.tokens = {}
+        self.stats = {"connections": 0, "token_requests": 0, "scoring_requests": 0, "scored_rows": 0, "errors": 0}
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class MockWatsonxHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without TCP_NODELAY every
+    # keep-alive response stalls ~40 ms on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path.startswith("/identity/token"):
+            self._token(body)
+        elif "/ml/v4/deployments/" in self.path and "/predictions" in self.path:
+            self._score(body)
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def _token(self, body):
+        server = self.server
+        server.count("token_requests")
+        token = f"mock-token-{random.getrandbits(64):016x}"
+        now = int(time.time())
+        with server.lock:
+            server.tokens[token] = now + server.token_ttl
+        self._send_json(200, {
+            "access_token": token,
+            "token_type": "Bearer",
+            "expires_in": server.token_ttl,
+            "expiration": now + server.token_ttl,
+        })
+
+    def _score(self, body):
+        server = self.server
+        server.count("scoring_requests")
+        if server.latency:
+            time.sleep(server.latency)
+
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+        with server.lock:
+            expires_at = server.tokens.get(token)
+        if expires_at is None or expires_at < time.time():
+            self._send_json(401, {"errors": [{"code": "authentication_token_expired"}]})
+            return
+
+        with server.lock:
+            fail = server.fail_first > 0
+            server.fail_first -= fail
+        if fail or (server.error_rate and random.random() < server.error_rate):
+            server.count("errors")
+            self._send_json(server.error_status, {"errors": [{"code": "injected_failure"}]})
+            return
+
+        try:
+            values = json.loads(body)["input_data"][0]["values"]
+        except (ValueError, KeyError, IndexError):
+            self._send_json(400, {"errors": [{"code": "invalid_input_data"}]})
+            return
+
+        server.count("scored_rows", len(values))
+        self._send_json(200, {
+            "predictions": [{"fields": ["prediction"], "values": [[mock_salary(row)] for row in values]}]
+        })
+
+
+def start_mock_server(port=0, **options):
+    server = MockWatsonxServer(("127.0.0.1", port), **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for IAM and the Watsonx scoring endpoint.")
+    parser.add_argument("--port", type=int, default=8555)
+    parser.add_argument("--token-ttl", type=int, default=3600, help="Seconds before minted tokens expire")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every scoring call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of scoring calls that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status for injected failures")
+    args = parser.parse_args()
+
+    server = MockWatsonxServer(("127.0.0.1", args.port), token_ttl=args.token_ttl, latency=args.latency,
+                               error_rate=args.error_rate, error_status=args.error_status)
+    print(f"✅ Mock Watsonx listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"📊 {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
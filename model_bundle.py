@@ -0,0 +1,218 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from numpy_trees import TREES_FILE, ArrayScaler, ArrayVocabulary, TreeEnsemble, export_trees, save_trees
+
+BUNDLE_DIR = "salary_bundle"
+BUNDLE_FORMAT = "salary-model-bundle"
+BUNDLE_VERSION = 1
+
+MODEL_FILE = "model.ubj"
+MEAN_FILE = "scaler_mean.npy"
+SCALE_FILE = "scaler_scale.npy"
+
+
+class BundleError(Exception):
+    pass
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _vocab_file(col):
+    return f"vocab_{col}.npy"
+
+
+def write_bundle(model, scaler, label_encoders, path=BUNDLE_DIR, features=None):
+    # Booster in XGBoost's native binary format, scaler and vocabularies as plain
+    # fixed-width arrays, and a manifest with checksums tying them to one run
+    from jobl import FEATURES
+
+    features = features or FEATURES
+    # Each version gets its own directory; `path` is then pointed at it
+    versions = f"{path}.versions"
+    tmp = os.path.join(versions, f"tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    model.get_booster().save_model(os.path.join(tmp, MODEL_FILE))
+    # Same trees as flat arrays, for serving without the xgboost library
+    save_trees(export_trees(model.get_booster()), os.path.join(tmp, TREES_FILE))
+    np.save(os.path.join(tmp, MEAN_FILE), np.asarray(scaler.mean_, dtype=np.float64))
+    np.save(os.path.join(tmp, SCALE_FILE), np.asarray(scaler.scale_, dtype=np.float64))
+    for col, le in label_encoders.items():
+        np.save(os.path.join(tmp, _vocab_file(col)), np.asarray(le.classes_, dtype=str))
+
+    files = [MODEL_FILE, TREES_FILE, MEAN_FILE, SCALE_FILE] + [_vocab_file(col) for col in label_encoders]
+    checksums = {name: file_sha256(os.path.join(tmp, name)) for name in files}
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        # One id for the whole run; changes whenever any artifact changes
+        "model_version": hashlib.sha256(json.dumps(checksums, sort_keys=True).encode()).hexdigest()[:12],
+        "features": list(features),
+        "categorical": list(label_encoders),
+        "scaler": {"n_samples_seen": int(getattr(scaler, "n_samples_seen_", 0))},
+        # Training hyperparameters; the booster file alone does not keep them
+        "params": {k: v for k, v in model.get_xgb_params().items() if v is not None and k not in ("base_score", "n_jobs")},
+        "files": checksums,
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    target = os.path.join(versions, manifest["model_version"])
+    if os.path.exists(target):
+        # Same artifacts as an existing version, which a reader may be loading right now
+        shutil.rmtree(tmp)
+    else:
+        os.replace(tmp, target)
+    previous = _swap_in(path, target)
+
+    # Keep the previous version too: a reader that resolved it before the swap may still be loading it
+    keep = {os.path.realpath(target), previous}
+    for version in glob.glob(os.path.join(glob.escape(versions), "*")):
+        if not os.path.basename(version).startswith("tmp-") and os.path.realpath(version) not in keep:
+            shutil.rmtree(version, ignore_errors=True)
+    return manifest
+
+
+def _swap_in(path, target):
+    # Points `path` at the finished version directory; returns the version it pointed at before.
+    # Renaming a new symlink over the old one is atomic, so readers see one bundle or the other
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    if os.path.isdir(path) and not os.path.islink(path):
+        # A bundle directory from before versioning; replaced once, a symlink from then on
+        shutil.rmtree(path)
+    link = f"{path}.link-{os.getpid()}"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.relpath(target, os.path.dirname(os.path.abspath(path))), link, target_is_directory=True)
+    os.replace(link, path)
+    return previous
+
+
+def resolve_bundle(path=BUNDLE_DIR):
+    # The directory behind `path`, resolved once so a load never mixes files of two versions
+    return os.path.realpath(path)
+
+
+def read_manifest(path=BUNDLE_DIR):
+    path = resolve_bundle(path)
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleError(f"{path} is not a salary model bundle")
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise BundleError(f"Unsupported bundle version {manifest.get('version')} (expected {BUNDLE_VERSION})")
+    return manifest
+
+
+def verify_bundle(path=BUNDLE_DIR):
+    path = resolve_bundle(path)
+    manifest = read_manifest(path)
+    expected = {MODEL_FILE, MEAN_FILE, SCALE_FILE} | {_vocab_file(col) for col in manifest["categorical"]}
+    if set(manifest["files"]) - {TREES_FILE} != expected:
+        raise BundleError(f"Manifest lists {sorted(manifest['files'])}, expected {sorted(expected)}")
+    for name, checksum in manifest["files"].items():
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path):
+            raise BundleError(f"Missing bundle file {name}")
+        if file_sha256(file_path) != checksum:
+            raise BundleError(f"Checksum mismatch for {name}: bundle files do not match its manifest")
+    return manifest
+
+
+def load_bundle(path=BUNDLE_DIR, verify=True, engine="xgboost"):
+    # engine="numpy" returns a TreeEnsemble instead of an XGBRegressor, and the scaler and
+    # vocabularies as plain arrays; it imports neither xgboost nor sklearn
+    path = resolve_bundle(path)
+    manifest = verify_bundle(path) if verify else read_manifest(path)
+    features = manifest["features"]
+
+    mean = np.load(os.path.join(path, MEAN_FILE), mmap_mode="r")
+    scale = np.load(os.path.join(path, SCALE_FILE), mmap_mode="r")
+    if len(mean) != len(features) or len(scale) != len(features):
+        raise BundleError(f"Scaler has {len(mean)} features, manifest lists {len(features)}")
+    vocabularies = {col: np.load(os.path.join(path, _vocab_file(col))).astype(object) for col in manifest["categorical"]}
+
+    if engine == "numpy":
+        if TREES_FILE not in manifest["files"]:
+            raise BundleError(f"{path} has no {TREES_FILE}; rebuild it with model_bundle.py")
+        model = TreeEnsemble.load(os.path.join(path, TREES_FILE))
+        if model.n_features_in_ != len(features):
+            raise BundleError(f"Model expects {model.n_features_in_} features, manifest lists {len(features)}")
+        scaler = ArrayScaler(mean, scale)
+        label_encoders = {col: ArrayVocabulary(classes) for col, classes in vocabularies.items()}
+        return model, scaler, label_encoders, manifest
+
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+    from xgboost import XGBRegressor
+
+    model = XGBRegressor(**manifest.get("params", {}))
+    model.load_model(os.path.join(path, MODEL_FILE))
+    n_features = model.get_booster().num_features()
+    if n_features != len(features):
+        raise BundleError(f"Model expects {n_features} features, manifest lists {len(features)}")
+
+    # Rebuild the fitted sklearn objects the training code already knows how to use
+    scaler = StandardScaler()
+    scaler.mean_ = np.array(mean)
+    scaler.scale_ = np.array(scale)
+    scaler.var_ = scaler.scale_ ** 2
+    scaler.n_features_in_ = len(features)
+    scaler.feature_names_in_ = np.asarray(features, dtype=object)
+    scaler.n_samples_seen_ = manifest["scaler"]["n_samples_seen"]
+
+    label_encoders = {}
+    for col, classes in vocabularies.items():
+        le = LabelEncoder()
+        le.classes_ = classes
+        label_encoders[col] = le
+
+    return model, scaler, label_encoders, manifest
+
+
+def bundle_exists(path=BUNDLE_DIR):
+    return os.path.exists(os.path.join(resolve_bundle(path), "manifest.json"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or check the single-directory model bundle.")
+    parser.add_argument("--path", default=BUNDLE_DIR, help="Bundle directory")
+    parser.add_argument("--verify", action="store_true", help="Only verify an existing bundle")
+    parser.add_argument("--engine", choices=["xgboost", "numpy"], default="xgboost", help="Model runtime to time the load with")
+    args = parser.parse_args()
+
+    if not args.verify:
+        import joblib
+        from jobl import ENCODERS_PATH, MODEL_PATH, SCALER_PATH
+
+        # Convert the legacy three-pickle artifacts
+        model = joblib.load(MODEL_PATH)
+        scaler = joblib.load(SCALER_PATH)
+        label_encoders = joblib.load(ENCODERS_PATH)
+        manifest = write_bundle(model, scaler, label_encoders, args.path)
+        print(f"✅ Bundle {manifest['model_version']} written to {args.path}/")
+
+    start = time.perf_counter()
+    model, scaler, label_encoders, manifest = load_bundle(args.path, engine=args.engine)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"✅ Bundle {manifest['model_version']} verified and loaded in {elapsed:.1f} ms ({args.engine})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,66 +1,189 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
 import pandas as pd
 import numpy as np
 import joblib
-from datetime import datetime
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score
+import xgboost as xgb
 from xgboost import XGBRegressor
 
-# === 1. Load Raw Data ===
-df = pd.read_csv("employee_records.csv")
-
-# === 2. Drop irrelevant columns ===
-df.drop(columns=["Employee_ID", "Employee_Name"], inplace=True)
-
-# === 3. Extract YearsExperience ===
-df["Joining_Date"] = pd.to_datetime(df["Joining_Date"], errors="coerce")
-df["YearsExperience"] = datetime.now().year - df["Joining_Date"].dt.year
-df.drop(columns=["Joining_Date"], inplace=True)
-
-# === 4. Normalize categorical values ===
-# Position mapping
-position_mapping = {
-    "Software Engineer": "Developer",
-    "Engineer": "Developer",
-    "Software Developer": "Developer",
-    "Senior Developer": "Developer",
-    "Software Dev": "Developer",
-    "HR Executive": "Executive",
-    "Sales Executive": "Executive",
-    "Support Staff": "Support",
-    "Marketing Executive": "Executive",
-    "Consulting Engineer": "Consultant"
-}
-
-# Department mapping
-department_mapping = {
-    "Software": "Engineering",
-    "Tech": "Engineering",
-    "Technical": "Engineering",
-    "IT": "Engineering",
-    "People": "HR",
-    "Customer Service": "Support",
-    "Business": "Sales"
-}
-
-df["Position"] = df["Position"].replace(position_mapping)
-df["Department"] = df["Department"].replace(department_mapping)
-
-# === 5. Drop missing values ===
-df.dropna(inplace=True)
-
-# === 6. Separate features and target ===
-target_column = "Salary"
-X = df.drop(columns=[target_column])
-y = df[target_column]
-
-# === 7. Encode categoricals ===
-label_encoders = {}
-for col in X.select_dtypes(include="object").columns:
-    le = LabelEncoder()
-    X[col] = le.fit_transform(X[col])
-    label_encoders[col] = le
+from ingest import CATEGORICAL, TARGET, appended_since, load_training_data, read_appended, read_preceding, source_state
+from jobl import FEATURES
+from model_bundle import bundle_exists, load_bundle, read_manifest, write_bundle
+
+# Which part of the CSV the saved model has seen; read by --incremental
+TRAIN_STATE = "train_state.json"
+
+parser = argparse.ArgumentParser(description="Train the local salary model.")
+parser.add_argument("--data", default="employee_records.csv", help="Employee records CSV")
+parser.add_argument("--chunksize", type=int, default=None, help="Read the CSV in chunks of this many rows")
+parser.add_argument("--engine", choices=["c", "pyarrow"], default=None, help="CSV parser engine")
+parser.add_argument("--no-cache", action="store_true", help="Ignore the cached feature matrix and rebuild it")
+parser.add_argument("--fast", action="store_true", help="Histogram trees, explicit threads, QuantileDMatrix and early stopping")
+parser.add_argument("--nthread", type=int, default=os.cpu_count(), help="Training threads in --fast mode")
+parser.add_argument("--max-rounds", type=int, default=1000, help="Boosting round cap in --fast mode")
+parser.add_argument("--early-stopping-rounds", type=int, default=20, help="Stop after this many rounds without validation gain")
+parser.add_argument("--val-size", type=float, default=0.1, help="Share of training rows held out for early stopping")
+parser.add_argument("--incremental", action="store_true", help="Boost the saved model on rows appended since the last run")
+parser.add_argument("--update-rounds", type=int, default=20, help="Most boosting rounds added per --incremental run")
+parser.add_argument("--min-new-rows", type=int, default=500, help="Fewer appended rows are left for a later --incremental run")
+parser.add_argument("--replay-rows", type=int, default=20_000, help="Earlier rows (the latest ones) trained on with the new rows")
+parser.add_argument("--max-total-rounds", type=int, default=600, help="Rebuild from scratch once the model has this many rounds")
+args = parser.parse_args()
+
+
+def peak_memory_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+timings = {}
+stage_start = time.perf_counter()
+
+
+def end_stage(name):
+    global stage_start
+    now = time.perf_counter()
+    timings[name] = now - stage_start
+    stage_start = now
+
+
+def report_timings():
+    print("⏱️ Timing breakdown:")
+    for name, seconds in timings.items():
+        print(f"   {name:<10} {seconds:8.2f}s")
+    print(f"   {'total':<10} {sum(timings.values()):8.2f}s")
+    peak = peak_memory_mb()
+    print(f"📈 Peak memory: {peak:,.0f} MB" if peak is not None else "📈 Peak memory: n/a on this platform")
+
+
+def save_train_state(state, model_version, rows):
+    # state: source_state() taken before the data was read, so rows appended
+    # during training are left for the next incremental run; rows: records the model has seen
+    with open(TRAIN_STATE, "w") as f:
+        json.dump({**state, "model_version": model_version, "rows": rows}, f, indent=2)
+
+
+def encode_records(records, label_encoders):
+    # Feature frame in the saved encoding, or the first category the encoders have never seen
+    X = pd.DataFrame(index=records.index)
+    for col in FEATURES:
+        if col in CATEGORICAL:
+            classes = label_encoders[col].classes_
+            codes = pd.Categorical(records[col].astype(str), categories=classes).codes
+            if (codes < 0).any():
+                unseen = sorted(set(records[col].astype(str)) - set(classes))
+                return None, f"new {col} value(s) {', '.join(unseen)}"
+            X[col] = codes.astype(np.float64)
+        else:
+            X[col] = records[col].astype(np.float64)
+    return X, None
+
+
+def incremental_update():
+    # Continues boosting the saved model on the rows appended since the last run,
+    # reusing its scaler and vocabularies. Returns None when done, or the reason
+    # a full rebuild is needed instead.
+    if not os.path.exists(TRAIN_STATE) or not bundle_exists():
+        return f"no {TRAIN_STATE} or model bundle from a previous run"
+    with open(TRAIN_STATE) as f:
+        state = json.load(f)
+    if state.get("model_version") != read_manifest()["model_version"]:
+        return "the saved model was not produced by the run recorded in the state file"
+    if state.get("year") != time.localtime().tm_year:
+        # YearsExperience is relative to the current year, so every old row shifted
+        return "the year changed since the last run"
+    if not appended_since(args.data, state):
+        return f"{args.data} was rewritten, not appended to"
+
+    new, end = read_appended(args.data, state["offset"])
+    if new.empty:
+        print("✅ No new records since the last run; model unchanged.")
+        return None
+    if len(new) < args.min_new_rows:
+        # The offset is not advanced, so these rows are read again with the next ones
+        print(f"✅ Only {len(new):,} new records (--min-new-rows {args.min_new_rows}); model unchanged.")
+        return None
+    # The latest earlier rows are boosted on too, so the new trees fit the new rows
+    # without pulling the model away from everything before them
+    row_bytes = (end - state["offset"]) / len(new)
+    replay = read_preceding(args.data, state["offset"], int(args.replay_rows * row_bytes)).tail(args.replay_rows)
+    end_stage("load")
+    print(f"✅ Read {len(new):,} new records and {len(replay):,} earlier ones")
+
+    model, scaler, label_encoders, manifest = load_bundle()
+    params = {k: v for k, v in model.get_xgb_params().items() if v is not None and k != "base_score"}
+    if "learning_rate" not in params:
+        return "the bundle does not record its training parameters"
+    X_new, reason = encode_records(new, label_encoders)
+    if reason:
+        return reason
+    X_replay, reason = encode_records(replay, label_encoders)
+    if reason:
+        return reason
+    y_new, y_replay = new[TARGET].to_numpy(), replay[TARGET].to_numpy()
+
+    # Rounds grow with the share of data that is new: a run on 1% new rows adds about 1% more trees
+    rounds = model.get_booster().num_boosted_rounds()
+    seen = state.get("rows") or manifest["scaler"]["n_samples_seen"]
+    added = min(args.update_rounds, math.ceil(rounds * len(new) / seen))
+    if rounds + added > args.max_total_rounds:
+        return f"the model would grow past {args.max_total_rounds} rounds"
+    X_scaled = scaler.transform(pd.concat([X_replay, X_new]))
+    y = np.concatenate([y_replay, y_new])
+    X_replay_scaled, X_new_scaled = X_scaled[:len(replay)], X_scaled[len(replay):]
+    end_stage("preprocess")
+
+    # The new rows have not been trained on yet, so the old model's error on them is out of sample
+    rmse_before = np.sqrt(mean_squared_error(y_new, model.predict(X_new_scaled)))
+    updated = XGBRegressor(**params, n_estimators=added)
+    updated.fit(X_scaled, y, xgb_model=model.get_booster())
+    rmse_after = np.sqrt(mean_squared_error(y_new, updated.predict(X_new_scaled)))
+    print(f"✅ Added {added} rounds ({rounds} → {updated.get_booster().num_boosted_rounds()})")
+    print(f"✅ RMSE on new records: ₹{rmse_before:.2f} before, ₹{rmse_after:.2f} after")
+    if len(replay):
+        replay_before = np.sqrt(mean_squared_error(y_replay, model.predict(X_replay_scaled)))
+        replay_after = np.sqrt(mean_squared_error(y_replay, updated.predict(X_replay_scaled)))
+        print(f"✅ RMSE on earlier records: ₹{replay_before:.2f} before, ₹{replay_after:.2f} after")
+    end_stage("fit")
+
+    joblib.dump(updated, "salary_model_clean.pkl")
+    manifest = write_bundle(updated, scaler, label_encoders)
+    save_train_state(source_state(args.data, end), manifest["model_version"], seen + len(new))
+    print(f"✅ Model saved (bundle {manifest['model_version']}).")
+    end_stage("save")
+    return None
+
+
+if args.incremental:
+    reason = incremental_update()
+    if reason is None:
+        report_timings()
+        sys.exit(0)
+    print(f"🔁 Full rebuild: {reason}")
+    stage_start = time.perf_counter()
+    timings.clear()
+
+
+# === 1-7. Load, clean and encode (typed read, cached by source file hash) ===
+source = source_state(args.data)
+X_encoded, y, label_encoders, from_cache = load_training_data(
+    args.data, chunksize=args.chunksize, engine=args.engine, use_cache=not args.no_cache
+)
+X = pd.DataFrame(X_encoded, columns=FEATURES).astype(np.float64)
+print(f"{'♻️ Loaded cached' if from_cache else '✅ Built'} feature matrix: {len(X):,} rows")
+end_stage("load")
 
 # === 8. Scale features ===
 scaler = StandardScaler()
@@ -71,17 +194,53 @@ X_train, X_test, y_train, y_test = train_test_split(
     X_scaled, y, test_size=0.2, random_state=42
 )
 
+end_stage("preprocess")
+
 # === 10. Train XGBoost ===
-model = XGBRegressor(n_estimators=200, learning_rate=0.05, max_depth=6, random_state=42)
-model.fit(X_train, y_train)
+if args.fast:
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=args.val_size, random_state=42
+    )
+    # Quantised once; the validation matrix reuses the training bin edges
+    dtrain = xgb.QuantileDMatrix(X_fit, y_fit, nthread=args.nthread)
+    dval = xgb.QuantileDMatrix(X_val, y_val, ref=dtrain, nthread=args.nthread)
+    params = {
+        "objective": "reg:squarederror",
+        "tree_method": "hist",
+        "learning_rate": 0.05,
+        "max_depth": 6,
+        "nthread": args.nthread,
+        "seed": 42,
+    }
+    booster = xgb.train(
+        params, dtrain, num_boost_round=args.max_rounds, evals=[(dval, "validation")],
+        early_stopping_rounds=args.early_stopping_rounds, verbose_eval=False,
+    )
+    print(f"✅ Early stopping kept {booster.best_iteration + 1} of {booster.num_boosted_rounds()} rounds")
+    # Keep only the rounds up to the best one, wrapped in the sklearn estimator the apps load
+    booster = booster[: booster.best_iteration + 1]
+    model = XGBRegressor(tree_method="hist", learning_rate=0.05, max_depth=6, random_state=42)
+    model.load_model(booster.save_raw("ubj"))
+else:
+    model = XGBRegressor(n_estimators=200, learning_rate=0.05, max_depth=6, random_state=42)
+    model.fit(X_train, y_train)
+end_stage("fit")
 
 # === 11. Evaluate ===
 y_pred = model.predict(X_test)
 print(f"✅ R² Score: {r2_score(y_test, y_pred):.4f}")
 print(f"✅ RMSE: ₹{np.sqrt(mean_squared_error(y_test, y_pred)):.2f}")
+end_stage("evaluate")
 
 # === 12. Save model and tools ===
 joblib.dump(model, "salary_model_clean.pkl")
 joblib.dump(scaler, "scaler_clean.pkl")
 joblib.dump(label_encoders, "label_encoders_clean.pkl")
-print("✅ Model and preprocessors saved successfully.")
+# Versioned bundle the apps load first (native booster, plain arrays, checksums)
+manifest = write_bundle(model, scaler, label_encoders)
+save_train_state(source, manifest["model_version"], len(X))
+print(f"✅ Model and preprocessors saved successfully (bundle {manifest['model_version']}).")
+end_stage("save")
+
+# === 13. Timing report ===
+report_timings()
@@ -0,0 +1,209 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+TREES_FILE = "trees.npz"
+
+# Objectives whose prediction is just base_score + sum of leaves
+IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:squaredlogerror", "reg:absoluteerror", "reg:pseudohubererror"}
+
+
+def _base_score(value):
+    # Stored as "8.98E4" (or "[8.98E4]" by newer xgboost releases)
+    return float(value.strip("[]"))
+
+
+def export_trees(booster):
+    # Flatten every tree into one set of node arrays. Tree t occupies nodes
+    # roots[t]..roots[t + 1] - 1; leaves point to themselves so walking past
+    # them is a no-op, which lets every tree be stepped the same number of times.
+    model = json.loads(booster.save_raw("json"))
+    learner = model["learner"]
+    objective = learner["objective"]["name"]
+    if objective not in IDENTITY_OBJECTIVES:
+        raise ValueError(f"Objective '{objective}' is not supported by the NumPy evaluator")
+    trees = learner["gradient_booster"]["model"]["trees"]
+
+    feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    offset = 0
+    depth = 0
+    for tree in trees:
+        if any(tree["split_type"]):
+            raise ValueError("Categorical splits are not supported by the NumPy evaluator")
+        lc = np.asarray(tree["left_children"], dtype=np.int64)
+        rc = np.asarray(tree["right_children"], dtype=np.int64)
+        nodes = np.arange(len(lc))
+        leaf = lc == -1
+
+        roots.append(offset)
+        feature.append(np.where(leaf, 0, tree["split_indices"]))
+        threshold.append(np.where(leaf, np.inf, tree["split_conditions"]))
+        left.append(np.where(leaf, nodes, lc) + offset)
+        right.append(np.where(leaf, nodes, rc) + offset)
+        default_left.append(np.asarray(tree["default_left"], dtype=bool))
+        value.append(np.where(leaf, tree["split_conditions"], 0.0))
+
+        # Depth of this tree = longest parent chain
+        node_depth = np.zeros(len(lc), dtype=np.int64)
+        for node in nodes:
+            if not leaf[node]:
+                node_depth[lc[node]] = node_depth[rc[node]] = node_depth[node] + 1
+        depth = max(depth, int(node_depth.max()))
+        offset += len(lc)
+
+    return {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float32),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "default_left": np.concatenate(default_left),
+        "value": np.concatenate(value).astype(np.float32),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "depth": np.int32(depth),
+        "base_score": np.float32(_base_score(learner["learner_model_param"]["base_score"])),
+        "num_feature": np.int32(int(learner["learner_model_param"]["num_feature"])),
+    }
+
+
+def save_trees(arrays, path):
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+class TreeEnsemble:
+    # Drop-in for XGBRegressor.predict on exported arrays; needs only NumPy.
+    # At load time every tree is padded to a complete binary tree of the
+    # ensemble's depth (a leaf above the last level repeats itself down to it),
+    # so a node's children are always 2i+1 / 2i+2 and all trees advance one
+    # level per step. Splits reuse few distinct (feature, threshold) tests, so
+    # each block evaluates those tests once and the walk only gathers bits.
+
+    def __init__(self, arrays, block_rows=256):
+        self.depth = int(arrays["depth"])
+        self.base_score = np.float32(arrays["base_score"])
+        self.n_features_in_ = int(arrays["num_feature"])
+        self.block_rows = block_rows
+
+        feature, threshold = arrays["feature"], arrays["threshold"]
+        left, right = arrays["left"], arrays["right"]
+        default_left, value, roots = arrays["default_left"], arrays["value"], arrays["roots"]
+        is_leaf = left == np.arange(len(left))
+
+        # Distinct split tests; test 0 is reserved for "always go left" (padding below leaves)
+        tests = np.stack([feature, threshold.view(np.int32), default_left.astype(np.int32)], axis=1)
+        unique, test_of_node = np.unique(tests[~is_leaf], axis=0, return_inverse=True)
+        node_test = np.zeros(len(left), dtype=np.int64)
+        node_test[~is_leaf] = test_of_node.ravel() + 1
+        self.test_feature = np.concatenate([[0], unique[:, 0]]).astype(np.intp)
+        self.test_threshold = np.concatenate([[np.inf], unique[:, 1].view(np.float32)]).astype(np.float32)
+        self.test_default_left = np.concatenate([[True], unique[:, 2].astype(bool)])
+
+        inner = 2 ** self.depth - 1
+        self.tests = np.zeros((len(roots), max(inner, 1)), dtype=np.int64)
+        self.leaves = np.zeros((len(roots), 2 ** self.depth), dtype=np.float32)
+        for t, root in enumerate(roots):
+            # Breadth-first over the padded tree: slot -> original node
+            slots = np.array([root])
+            for level in range(self.depth):
+                first = 2 ** level - 1
+                self.tests[t, first:first + len(slots)] = node_test[slots]
+                slots = np.stack([left[slots], np.where(is_leaf[slots], slots, right[slots])], axis=1).ravel()
+            self.leaves[t] = value[slots]
+        # int32 indices gather noticeably faster than intp on these small tables
+        self.tests_flat = self.tests.ravel().astype(np.int32)
+        self.tree_offset = (np.arange(len(roots)) * self.tests.shape[1]).astype(np.int32)
+        self.leaves_flat = self.leaves.ravel()
+        self.leaf_offset = (np.arange(len(roots)) * self.leaves.shape[1] - inner).astype(np.int32)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files}, **kwargs)
+
+    def _test_bits(self, block):
+        # xgboost compares float32 inputs against float32 thresholds: go left when x < threshold,
+        # or when x is missing and the split's default direction is left
+        x = block[:, self.test_feature]
+        bits = x < self.test_threshold
+        missing = np.isnan(x)
+        if missing.any():
+            bits |= missing & self.test_default_left
+        return bits
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+        n_tests = len(self.test_feature)
+        out = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), self.block_rows):
+            block = X[start:start + self.block_rows]
+            go_right = (~self._test_bits(block)).view(np.uint8).ravel()
+            row_base = (np.arange(len(block), dtype=np.int32) * n_tests)[:, None]
+            slot = np.zeros((len(block), len(self.tree_offset)), dtype=np.int32)
+            for _ in range(self.depth):
+                test = self.tests_flat[self.tree_offset + slot]
+                slot = 2 * slot + 1 + go_right[row_base + test]
+            # After the last level, slot - inner is the leaf's position in its row of leaves
+            leaves = self.leaves_flat[self.leaf_offset + slot]
+            out[start:start + len(block)] = leaves.sum(axis=1, dtype=np.float64) + self.base_score
+        return out
+
+
+class ArrayScaler:
+    # A fitted StandardScaler's mean_/scale_, applied with NumPy alone (same float64 arithmetic)
+    def __init__(self, mean, scale):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self.n_features_in_ = len(self.mean_)
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class ArrayVocabulary:
+    # A fitted LabelEncoder's classes_, for code that only looks labels up
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes, dtype=object)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the XGBoost trees to NumPy arrays and check them against xgboost.")
+    parser.add_argument("--output", default=TREES_FILE, help="Where to write the tree arrays (.npz)")
+    parser.add_argument("--check-rows", type=int, default=20_000, help="Random rows compared against model.predict")
+    args = parser.parse_args()
+
+    from jobl import load_artifacts
+
+    model, scaler, label_encoders = load_artifacts()
+    arrays = export_trees(model.get_booster())
+    save_trees(arrays, args.output)
+    ensemble = TreeEnsemble(arrays)
+    print(f"✅ Exported {len(arrays['roots'])} trees ({len(arrays['feature']):,} nodes, depth {ensemble.depth}) → {args.output}")
+
+    # Random scaled inputs spanning the encoders' vocabularies and the UI numeric ranges
+    rng = np.random.default_rng(0)
+    raw = np.column_stack([
+        rng.integers(18, 66, args.check_rows),
+        rng.integers(0, len(label_encoders["Country"].classes_), args.check_rows),
+        rng.integers(0, len(label_encoders["Department"].classes_), args.check_rows),
+        rng.integers(0, len(label_encoders["Position"].classes_), args.check_rows),
+        rng.integers(0, 41, args.check_rows),
+    ]).astype(np.float64)
+    X = (raw - scaler.mean_) / scaler.scale_
+
+    start = time.perf_counter()
+    expected = model.predict(X)
+    xgb_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    got = ensemble.predict(X)
+    numpy_ms = (time.perf_counter() - start) * 1000
+    diff = np.abs(expected - got).max()
+    print(f"🔍 Max difference vs xgboost on {args.check_rows:,} rows: ₹{diff:.4f} "
+          f"(xgboost {xgb_ms:.1f} ms, NumPy {numpy_ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
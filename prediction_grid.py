@@ -0,0 +1,141 @@
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from jobl import (
+    DEPARTMENT_MAPPING, ENCODERS_PATH, FEATURES, MODEL_PATH, POSITION_MAPPING, SCALER_PATH,
+    load_artifacts,
+)
+from model_bundle import BUNDLE_DIR, bundle_exists, file_sha256, read_manifest
+
+GRID_PATH = "salary_grid.npy"
+GRID_META_PATH = "salary_grid.json"
+
+# Numeric ranges offered by the UI sliders; categoricals cover every encoder class
+AGE_RANGE = (18, 65)
+YEARS_RANGE = (0, 40)
+
+
+def artifact_hashes():
+    # A bundle already checksums its files, so its version identifies the artifacts
+    if bundle_exists():
+        return {BUNDLE_DIR: read_manifest()["model_version"]}
+    return {path: file_sha256(path) for path in (MODEL_PATH, SCALER_PATH, ENCODERS_PATH)}
+
+
+def grid_axes(label_encoders):
+    # Axis sizes in FEATURES order; the flat index is their mixed-radix number
+    return [
+        AGE_RANGE[1] - AGE_RANGE[0] + 1,
+        len(label_encoders["Country"].classes_),
+        len(label_encoders["Department"].classes_),
+        len(label_encoders["Position"].classes_),
+        YEARS_RANGE[1] - YEARS_RANGE[0] + 1,
+    ]
+
+
+def build_grid(model, scaler, label_encoders, path=GRID_PATH, meta_path=GRID_META_PATH, chunk_rows=200_000):
+    shape = grid_axes(label_encoders)
+    grid = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=tuple(shape))
+    flat = grid.reshape(-1)
+    total = flat.size
+
+    offsets = np.array([AGE_RANGE[0], 0, 0, 0, YEARS_RANGE[0]], dtype=np.float64)
+    for start in range(0, total, chunk_rows):
+        stop = min(start + chunk_rows, total)
+        # Decode flat indices back into one feature row per grid cell
+        cells = np.stack(np.unravel_index(np.arange(start, stop), shape), axis=1)
+        features = cells.astype(np.float64) + offsets
+        # Same in-place arithmetic as StandardScaler.transform
+        features -= scaler.mean_
+        features /= scaler.scale_
+        flat[start:stop] = model.predict(features)
+
+    grid.flush()
+    del grid
+
+    meta = {
+        "shape": shape,
+        "features": FEATURES,
+        "age_range": list(AGE_RANGE),
+        "years_range": list(YEARS_RANGE),
+        "classes": {col: [str(c) for c in label_encoders[col].classes_] for col in ("Country", "Department", "Position")},
+        "artifacts": artifact_hashes(),
+    }
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    return total
+
+
+class PredictionGrid:
+    def __init__(self, grid, label_encoders):
+        self.flat = grid.reshape(-1)
+        self.shape = grid.shape
+        aliases = {"Department": DEPARTMENT_MAPPING, "Position": POSITION_MAPPING}
+
+        # Raw UI label -> class code, with aliases resolved the same way predict_batch does
+        self.codes = {}
+        for col in ("Country", "Department", "Position"):
+            classes = {label: code for code, label in enumerate(label_encoders[col].classes_)}
+            table = dict(classes)
+            for raw, mapped in aliases.get(col, {}).items():
+                if mapped in classes:
+                    table[raw] = classes[mapped]
+                else:
+                    table.pop(raw, None)
+            self.codes[col] = table
+
+    def lookup(self, record):
+        # Returns None for anything outside the grid so the caller can use the model
+        age, years = record["Age"], record["YearsExperience"]
+        # Missing or non-finite values are left to the model path, which reports them
+        if age is None or years is None or not (math.isfinite(age) and math.isfinite(years)):
+            return None
+        if int(age) != age or int(years) != years:
+            return None
+        age, years = int(age) - AGE_RANGE[0], int(years) - YEARS_RANGE[0]
+        n_age, n_country, n_dept, n_pos, n_years = self.shape
+        if not (0 <= age < n_age and 0 <= years < n_years):
+            return None
+
+        country = self.codes["Country"].get(record["Country"])
+        dept = self.codes["Department"].get(record["Department"])
+        pos = self.codes["Position"].get(record["Position"])
+        if country is None or dept is None or pos is None:
+            return None
+
+        index = (((age * n_country + country) * n_dept + dept) * n_pos + pos) * n_years + years
+        return self.flat[index]
+
+
+def load_grid(label_encoders, path=GRID_PATH, meta_path=GRID_META_PATH):
+    # Missing or stale grids are ignored; predictions then come from the model
+    if not (os.path.exists(path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get("artifacts") != artifact_hashes() or meta.get("shape") != grid_axes(label_encoders):
+        return None
+    return PredictionGrid(np.load(path, mmap_mode="r"), label_encoders)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute local-model predictions for every UI input combination.")
+    parser.add_argument("--output", default=GRID_PATH, help="Grid array (.npy, memory-mapped at serve time)")
+    parser.add_argument("--meta", default=GRID_META_PATH, help="Grid metadata (axes and artifact hashes)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model, scaler, label_encoders = load_artifacts()
+    cells = build_grid(model, scaler, label_encoders, path=args.output, meta_path=args.meta)
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(args.output) / 1e6
+    print(f"✅ Scored {cells:,} grid cells in {elapsed:.2f}s → {args.output} ({size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import gc
+import os
+import signal
+import time
+
+# Pre-fork supervisor for serve.py (Linux/macOS; needs os.fork):
+#   python serve.py --workers 4 --max-requests 50000
+#   kill -HUP <master>    # rolling restart of every worker
+#   kill -USR1 <master>   # print per-process memory
+#   kill -TERM <master>   # drain in-flight requests and stop
+# With reload=..., a new model loaded by the master also triggers a rolling restart
+
+
+def memory_usage(pid="self"):
+    # From /proc/<pid>/smaps_rollup (Linux). Pss divides every shared page among
+    # the processes mapping it, so the Pss of the master plus its workers adds up
+    # to their real combined footprint while Rss counts shared pages in each one
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[name] = int(value.split()[0]) / 1024
+    except OSError:
+        return None
+    return {
+        "rss_mb": round(fields.get("Rss", 0.0), 1),
+        "pss_mb": round(fields.get("Pss", 0.0), 1),
+        "shared_mb": round(fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0), 1),
+        "private_mb": round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1),
+    }
+
+
+class PreforkMaster:
+    # The master has already loaded and warmed the model and bound the listening
+    # socket. It freezes the heap and forks workers that accept on that socket and
+    # share the model pages copy-on-write. The master itself only supervises:
+    # it replaces workers that exit, and drains and restarts them on request.
+
+    def __init__(self, server, workers, start_worker, max_requests=0, drain_timeout=10.0, report_interval=0,
+                 reload=None, reload_interval=0):
+        self.server = server
+        self.size = workers
+        self.start_worker = start_worker
+        self.max_requests = max_requests
+        self.drain_timeout = drain_timeout
+        self.report_interval = report_interval
+        # Called every reload_interval seconds; returns True once a new model is loaded in the master
+        self.reload = reload
+        self.reload_interval = reload_interval
+        self.workers = {}
+        self.retiring = set()
+        self.stopping = False
+        self._recycle_requested = False
+        self._report_requested = False
+
+    # ------------------------------
+    # Worker side
+    # ------------------------------
+    def _worker(self):
+        # Ctrl+C reaches the whole process group; only the master reacts to it
+        for sig in (signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(sig, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda *_: self.server.begin_drain())
+        self.start_worker()
+        self.server.max_requests = self.max_requests
+        self.server.serve_forever()
+        self.server.wait_idle(self.drain_timeout)
+        return 0
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = self._worker()
+            except Exception as e:
+                print(f"❌ Worker {os.getpid()} failed: {type(e).__name__}: {e}", flush=True)
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.time()
+        return pid
+
+    # ------------------------------
+    # Master side
+    # ------------------------------
+    def stop(self, *_):
+        self.stopping = True
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGTERM)
+
+    def _signal(self, pid, sig):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def recycle(self):
+        # Rolling restart: each replacement is forked before its predecessor drains,
+        # and forking is cheap because the model is already in memory
+        for pid in [p for p in self.workers if p not in self.retiring]:
+            self.spawn()
+            self.retiring.add(pid)
+            self._signal(pid, signal.SIGTERM)
+
+    def report(self):
+        processes = [("master", os.getpid())] + [("worker", pid) for pid in sorted(self.workers)]
+        usage = [(role, pid, memory_usage(pid)) for role, pid in processes]
+        usage = [(role, pid, mem) for role, pid, mem in usage if mem]
+        if not usage:
+            print("⚠️ Memory report needs /proc/<pid>/smaps_rollup (Linux)")
+            return
+        print(f"\n{'process':<8} {'pid':>8} {'rss MB':>8} {'pss MB':>8} {'shared':>8} {'private':>8}")
+        for role, pid, mem in usage:
+            print(f"{role:<8} {pid:>8} {mem['rss_mb']:>8.1f} {mem['pss_mb']:>8.1f} {mem['shared_mb']:>8.1f} {mem['private_mb']:>8.1f}")
+        workers = [mem for role, _, mem in usage if role == "worker"]
+        total_pss = sum(mem["pss_mb"] for _, _, mem in usage)
+        if workers:
+            # A separately loaded process holds at least what the master does, all of it private
+            separate = len(workers) * usage[0][2]["rss_mb"]
+            print(f"📊 {total_pss:.0f} MB (Σ pss) for the master and {len(workers)} workers, "
+                  f"vs ~{separate:.0f} MB for {len(workers)} separately loaded processes", flush=True)
+
+    def run(self):
+        # Objects that exist now are never collected; without this the first GC pass
+        # in each worker writes to every object header and un-shares those pages
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "_recycle_requested", True))
+        signal.signal(signal.SIGUSR1, lambda *_: setattr(self, "_report_requested", True))
+
+        for _ in range(self.size):
+            self.spawn()
+        next_report = time.time() + self.report_interval if self.report_interval else None
+        next_reload = time.time() + self.reload_interval if self.reload and self.reload_interval > 0 else None
+        try:
+            while self.workers:
+                if self._recycle_requested and not self.stopping:
+                    self._recycle_requested = False
+                    self.recycle()
+                if self._report_requested or (next_report and time.time() >= next_report):
+                    self._report_requested = False
+                    next_report = time.time() + self.report_interval if self.report_interval else None
+                    self.report()
+                if next_reload and time.time() >= next_reload and not self.stopping:
+                    next_reload = time.time() + self.reload_interval
+                    try:
+                        if self.reload():
+                            gc.collect()
+                            gc.freeze()
+                            self.recycle()
+                    except Exception as e:
+                        print(f"⚠️ Model reload check failed: {type(e).__name__}: {e}", flush=True)
+
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    time.sleep(0.2)
+                    continue
+                started = self.workers.pop(pid, time.time())
+                if pid in self.retiring:
+                    self.retiring.discard(pid)
+                    continue
+                if self.stopping:
+                    continue
+                code = os.waitstatus_to_exitcode(status)
+                if code != 0:
+                    print(f"⚠️ Worker {pid} exited with status {code}; replacing it", flush=True)
+                    # Back off when workers die right after starting, instead of fork-looping
+                    if time.time() - started < 1.0:
+                        time.sleep(1.0)
+                self.spawn()
+        finally:
+            self.server.server_close()
@@ -0,0 +1,101 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    # Bounded LRU with per-entry TTL. Expiry uses wall-clock time so entries
+    # persisted to disk keep their remaining lifetime across restarts.
+
+    def __init__(self, maxsize=1024, ttl=3600.0, path=None, save_every=50):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.save_every = save_every
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # One save at a time: put() can cross save_every on several threads, or race the atexit save
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._unsaved += 1
+            flush = self.path and self._unsaved >= self.save_every
+        if flush:
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def save(self):
+        if not self.path:
+            return
+        with self._save_lock:
+            now = time.time()
+            with self._lock:
+                entries = [[list(key), value, expires_at] for key, (value, expires_at) in self._entries.items() if expires_at > now]
+                self._unsaved = 0
+            # Write then rename so a crash never leaves a half-written cache file; the temp
+            # name is per process because pre-fork workers can share one cache path
+            tmp = f"{self.path}.tmp-{os.getpid()}"
+            with open(tmp, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+
+    def load(self):
+        if not (self.path and os.path.exists(self.path)):
+            return
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        with self._lock:
+            # Stored oldest-first, so re-inserting keeps the LRU order
+            for key, value, expires_at in entries:
+                if expires_at > now:
+                    self._entries[tuple(key)] = (value, expires_at)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
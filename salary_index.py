@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import appended_since, read_csv_range, source_state
+from jobl import DEPARTMENT_MAPPING, POSITION_MAPPING
+
+INDEX_PATH = "salary_index.npz"
+GROUP_COLUMNS = ["Position", "Department", "Country"]
+QUANTILES = {"min": 0.0, "p10": 0.10, "median": 0.50, "p90": 0.90, "max": 1.0}
+
+# Log-spaced salary bins ~1.8% wide; quantiles are interpolated inside a bin, so they land within one bin of the exact value
+BIN_RANGE = (1_000.0, 10_000_000.0)
+N_BINS = 512
+
+# Groups thinner than this borrow the distribution of a coarser group
+MIN_COUNT = 20
+
+class SalaryIndex:
+    # Per-group salary histograms over Position × Department × Country.
+    # Histograms with shared bin edges merge by addition, so appending records
+    # only adds counts; quantile tables for every fallback level are rebuilt
+    # from the counts after each change and lookups are dictionary hits.
+
+    def __init__(self, vocab=None, counts=None, minimum=None, maximum=None, source=None):
+        self.edges = np.geomspace(*BIN_RANGE, N_BINS + 1)
+        self._set(vocab, counts, minimum, maximum, source)
+
+    def _set(self, vocab=None, counts=None, minimum=None, maximum=None, source=None):
+        self.vocab = vocab or {col: [] for col in GROUP_COLUMNS}
+        shape = tuple(len(self.vocab[col]) for col in GROUP_COLUMNS)
+        self.counts = counts if counts is not None else np.zeros(shape + (N_BINS,), dtype=np.uint32)
+        self.minimum = minimum if minimum is not None else np.full(shape, np.inf)
+        self.maximum = maximum if maximum is not None else np.full(shape, -np.inf)
+        # ingest.source_state() plus "rows": how much of the CSV is already indexed
+        self.source = source or {}
+        self._refresh()
+
+    # ------------------------------
+    # Building / updating
+    # ------------------------------
+    def _codes(self, col, values):
+        # Grow the axis for labels the index has not seen yet
+        known = self.vocab[col]
+        new = [v for v in pd.unique(values) if v not in set(known)]
+        if new:
+            axis = GROUP_COLUMNS.index(col)
+            known.extend(new)
+            pad = [(0, 0)] * self.counts.ndim
+            pad[axis] = (0, len(new))
+            self.counts = np.pad(self.counts, pad)
+            self.minimum = np.pad(self.minimum, pad[:-1], constant_values=np.inf)
+            self.maximum = np.pad(self.maximum, pad[:-1], constant_values=-np.inf)
+        return pd.Categorical(values, categories=known).codes
+
+    def add(self, records):
+        # records: DataFrame with Position, Department, Country and Salary
+        data = records[GROUP_COLUMNS + ["Salary"]].dropna()
+        if data.empty:
+            return 0
+        position = data["Position"].astype(str).replace(POSITION_MAPPING)
+        department = data["Department"].astype(str).replace(DEPARTMENT_MAPPING)
+        codes = (
+            self._codes("Position", position),
+            self._codes("Department", department),
+            self._codes("Country", data["Country"].astype(str)),
+        )
+        salary = data["Salary"].to_numpy(dtype=np.float64)
+        bins = np.clip(np.searchsorted(self.edges, salary, side="right") - 1, 0, N_BINS - 1)
+
+        np.add.at(self.counts, codes + (bins,), 1)
+        np.minimum.at(self.minimum, codes, salary)
+        np.maximum.at(self.maximum, codes, salary)
+        self._refresh()
+        return len(data)
+
+    def update_from_csv(self, path, chunksize=200_000):
+        # Index only the rows appended since the last update; start over if the file was rewritten.
+        # Stops at the last complete line, so a row still being written is indexed next time
+        source = self.source
+        if source and not appended_since(path, source):
+            self._set()
+            source = {}
+
+        state = source_state(path)
+        added = 0
+        for chunk in read_csv_range(path, source.get("offset", 0), state["offset"], GROUP_COLUMNS + ["Salary"],
+                                    chunksize):
+            added += self.add(chunk)
+        self.source = {**state, "rows": source.get("rows", 0) + added}
+        return added
+
+    # ------------------------------
+    # Quantiles and lookup
+    # ------------------------------
+    def _quantiles(self, counts, minimum, maximum):
+        # counts (..., N_BINS) -> (..., len(QUANTILES)), interpolating in log space inside a bin
+        total = counts.sum(axis=-1, keepdims=True).astype(np.float64)
+        cumulative = np.cumsum(counts, axis=-1)
+        out = np.full(counts.shape[:-1] + (len(QUANTILES),), np.nan)
+        log_edges = np.log(self.edges)
+        for i, q in enumerate(QUANTILES.values()):
+            if q == 0.0:
+                out[..., i] = minimum
+                continue
+            if q == 1.0:
+                out[..., i] = maximum
+                continue
+            target = q * total
+            b = np.minimum((cumulative < target).sum(axis=-1, keepdims=True), N_BINS - 1)
+            below = np.take_along_axis(cumulative, b, axis=-1) - np.take_along_axis(counts, b, axis=-1)
+            in_bin = np.maximum(np.take_along_axis(counts, b, axis=-1), 1)
+            frac = np.clip((target - below) / in_bin, 0.0, 1.0)
+            value = np.exp(log_edges[b] + frac * (log_edges[b + 1] - log_edges[b]))[..., 0]
+            out[..., i] = np.clip(value, minimum, maximum)
+        out[total[..., 0] == 0] = np.nan
+        return out, total[..., 0].astype(np.int64)
+
+    def _refresh(self):
+        # Precompute every fallback level so lookups never touch the histograms
+        self._index = {col: {label: i for i, label in enumerate(self.vocab[col])} for col in GROUP_COLUMNS}
+        self._levels = []
+        for axes in [(), (2,), (1, 2), (0, 1, 2)]:
+            # axes summed away: () keeps P×D×C, (2,) keeps P×D, (1, 2) keeps P, all -> overall
+            counts = self.counts.sum(axis=axes) if axes else self.counts
+            minimum = self.minimum.min(axis=axes, initial=np.inf) if axes else self.minimum
+            maximum = self.maximum.max(axis=axes, initial=-np.inf) if axes else self.maximum
+            self._levels.append(self._quantiles(counts, minimum, maximum))
+
+    def lookup(self, position, department, country, min_count=MIN_COUNT):
+        # Returns {"min", "p10", "median", "p90", "max", "count", "group"} or None when empty
+        position = POSITION_MAPPING.get(position, position)
+        department = DEPARTMENT_MAPPING.get(department, department)
+        keys = [
+            self._index["Position"].get(position),
+            self._index["Department"].get(department),
+            self._index["Country"].get(country),
+        ]
+        groups = [(position, department, country), (position, department), (position,), ()]
+        for level, group in enumerate(groups):
+            key = tuple(keys[:len(group)])
+            if None in key:
+                continue
+            table, counts = self._levels[level]
+            if counts[key] >= min_count or not group:
+                if counts[key] == 0:
+                    return None
+                result = dict(zip(QUANTILES, (float(v) for v in table[key])))
+                result.update(count=int(counts[key]), group=" · ".join(group) or "All employees")
+                return result
+        return None
+
+    # ------------------------------
+    # Persistence
+    # ------------------------------
+    def save(self, path=INDEX_PATH):
+        meta = {"vocab": self.vocab, "source": self.source, "bins": [*BIN_RANGE, N_BINS]}
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, counts=self.counts, minimum=self.minimum, maximum=self.maximum,
+                                meta=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["bins"] != [*BIN_RANGE, N_BINS]:
+                raise ValueError(f"{path} uses different salary bins; rebuild it with salary_index.py --rebuild")
+            return cls(meta["vocab"], data["counts"], data["minimum"], data["maximum"], meta["source"])
+
+
+def load_or_build(csv_path="employee_records.csv", path=INDEX_PATH):
+    # Loads the saved index and folds in any rows appended to the CSV since it was written
+    index = SalaryIndex.load(path) if os.path.exists(path) else SalaryIndex()
+    if os.path.exists(csv_path) and index.update_from_csv(csv_path):
+        index.save(path)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the salary percentile index.")
+    parser.add_argument("--data", default="employee_records.csv", help="Employee records CSV")
+    parser.add_argument("--output", default=INDEX_PATH, help="Index file")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the existing index and start over")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = SalaryIndex() if args.rebuild or not os.path.exists(args.output) else SalaryIndex.load(args.output)
+    added = index.update_from_csv(args.data)
+    index.save(args.output)
+    groups = int((index.counts.sum(axis=-1) > 0).sum())
+    print(f"✅ Indexed {added:,} new rows ({index.source['rows']:,} total, {groups} groups) "
+          f"in {time.perf_counter() - start:.2f}s → {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+import argparse
+import json
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+from hot_reload import RELOAD_INTERVAL, WARMUP_RECORDS, LiveModel
+from prefork import PreforkMaster, memory_usage
+
+# Fields every record needs; Joining_Date may stand in for YearsExperience
+REQUIRED_FIELDS = ["Age", "Country", "Department", "Position"]
+
+# Idle keep-alive connections are closed after this many seconds, which also bounds a worker's drain
+KEEPALIVE_TIMEOUT = 5
+
+
+class MicroBatcher:
+    # Requests from many handler threads are queued and scored together: the
+    # worker takes the first waiting request, keeps collecting until it has
+    # max_batch rows or max_wait has passed, then runs one predict_batch
+    # (one scaler.transform + one model.predict) and hands each request its slice
+    # together with the model version that scored it.
+
+    def __init__(self, predict, max_batch=256, max_wait_ms=5.0):
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.stats = {"requests": 0, "rows": 0, "batches": 0}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="micro-batcher")
+        self._thread.start()
+
+    def submit(self, records):
+        future = Future()
+        self._queue.put((records, future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch, rows
+
+    def _run(self):
+        import pandas as pd
+
+        while True:
+            batch, rows = self._collect()
+            if metrics.enabled:
+                now = time.perf_counter()
+                wait = metrics.REGISTRY.histogram("salary_stage_seconds", "queue_wait")
+                for _, _, queued_at in batch:
+                    wait.observe(now - queued_at)
+            try:
+                data = pd.DataFrame([record for records, _, _ in batch for record in records])
+                with metrics.stage("batch_predict"):
+                    predictions, errors, version = self.predict(data)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            start = 0
+            for records, future, _ in batch:
+                end = start + len(records)
+                future.set_result((predictions[start:end], errors[start:end], version))
+                start = end
+            with self._lock:
+                self.stats["requests"] += len(batch)
+                self.stats["rows"] += rows
+                self.stats["batches"] += 1
+
+
+class ModelService:
+    # Owns the live model and the batcher; loading runs in the background so
+    # /healthz answers immediately and /readyz flips once the model is warm.
+    # A retrained bundle is loaded, warmed and swapped in without pausing requests.
+
+    def __init__(self, engine="xgboost", max_batch=256, max_wait_ms=5.0, threads=None):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        # xgboost threads per process; set to 1 in pre-fork mode
+        self.threads = threads
+        self.ready = False
+        self.error = None
+        self.batcher = None
+        self.live = LiveModel(self._load, warm=self._warm)
+
+    @property
+    def model_version(self):
+        return self.live.current[0] if self.live.current else None
+
+    def _load(self):
+        from jobl import load_artifacts
+
+        return load_artifacts(engine=self.engine)
+
+    def _warm(self, artifacts):
+        # First predictions in this process, so lazily built model state exists before fork() or swap
+        from hot_reload import warm_batch
+
+        model = artifacts[0]
+        if self.threads and hasattr(model, "get_booster"):
+            # Workers are the parallelism; one OpenMP thread each also keeps xgboost
+            # from forking with a live OpenMP pool, which libgomp does not support
+            model.get_booster().set_param({"nthread": self.threads})
+        warm_batch(*artifacts)
+
+    def _predict(self, data):
+        from jobl import predict_batch
+
+        # One snapshot per batch, so every row in it is scored by the same version
+        version, (model, scaler, label_encoders) = self.live.get()
+        predictions, _, errors = predict_batch(data, model, scaler, label_encoders)
+        return predictions, errors, version
+
+    def load(self):
+        self.live.get()
+
+    def start(self, reload_interval=0):
+        # Also called in each forked worker: threads do not survive fork()
+        self.batcher = MicroBatcher(self._predict, max_batch=self.max_batch, max_wait_ms=self.max_wait_ms)
+        self.batcher.start()
+        self.batcher.submit(WARMUP_RECORDS).result()
+        self.live.watch(reload_interval)
+        self.ready = True
+
+    def start_in_background(self, reload_interval=0):
+        def run():
+            try:
+                self.load()
+                self.start(reload_interval)
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                print(f"❌ Model failed to load: {self.error}")
+
+        threading.Thread(target=run, daemon=True, name="model-loader").start()
+
+
+def normalize_record(record):
+    missing = [f for f in REQUIRED_FIELDS if record.get(f) is None]
+    if missing:
+        raise ValueError(f"missing field(s) {', '.join(missing)}")
+    out = {f: str(record[f]) for f in ["Country", "Department", "Position"]}
+    # Non-numeric values are rejected here so one bad request cannot fail a shared batch
+    out["Age"] = float(record["Age"])
+    if record.get("YearsExperience") is not None:
+        out["YearsExperience"] = float(record["YearsExperience"])
+    elif record.get("Joining_Date"):
+        # Same derivation as training: current year minus joining year
+        joined = datetime.strptime(str(record["Joining_Date"])[:10], "%Y-%m-%d")
+        out["YearsExperience"] = datetime.now().year - joined.year
+    else:
+        raise ValueError("missing field YearsExperience (or Joining_Date)")
+    return out
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    timeout = KEEPALIVE_TIMEOUT
+    # Upper bound on how long a request waits for its batch
+    timeout_s = 30
+
+    def setup(self):
+        super().setup()
+        self.server.track_connection(1)
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            self.server.track_connection(-1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if self.server.draining or self.close_connection:
+            # Clients reconnect (to another worker, when draining) instead of reusing this connection
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.count_request()
+
+    def do_GET(self):
+        service = self.server.service
+        path = self.path.split("?")[0]
+        if path == "/healthz":
+            # Liveness: the process serves HTTP, whether or not the model is loaded yet
+            stats = service.batcher.stats if service.batcher else {}
+            self._send(200, {"status": "ok", "ready": service.ready, "pid": os.getpid(), **stats,
+                             "model_version": service.model_version, "reloads": service.live.reloads,
+                             "reload_error": service.live.error, "memory": memory_usage()})
+        elif path == "/readyz":
+            if service.ready:
+                self._send(200, {"status": "ready", "model_version": service.model_version})
+            else:
+                self._send(503, {"status": "failed" if service.error else "loading", "error": service.error})
+        elif path == "/metrics":
+            self._send(200, metrics.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send(404, {"error": f"unknown path {path}"})
+
+    def do_POST(self):
+        if self.path.split("?")[0] != "/predict":
+            self._send(404, {"error": f"unknown path {self.path}"})
+            return
+        service = self.server.service
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError(f"negative Content-Length {length}")
+        except ValueError as e:
+            # Without a usable length the body cannot be skipped, so the connection is not reused
+            self.close_connection = True
+            self._send(400, {"error": f"invalid request: {e}"})
+            return
+        body = self.rfile.read(length) if length else b""
+        if not service.ready:
+            self._send(503, {"error": "model is not loaded yet"})
+            return
+
+        # {"records": [{...}, ...]} or a single record
+        try:
+            payload = json.loads(body)
+            records = payload["records"] if isinstance(payload, dict) and "records" in payload else [payload]
+            records = [normalize_record(r) for r in records]
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            self._send(400, {"error": f"invalid request: {e}"})
+            return
+        if not records:
+            self._send(200, {"predictions": [], "errors": [], "model_version": service.model_version})
+            return
+
+        try:
+            predictions, errors, version = service.batcher.submit(records).result(timeout=self.timeout_s)
+        except Exception as e:
+            self._send(500, {"error": f"prediction failed: {e}"})
+            return
+        self._send(200, {
+            "predictions": [None if math.isnan(p) else round(float(p), 2) for p in predictions],
+            "errors": list(errors),
+            # The version that scored this batch, even if a newer one was swapped in since
+            "model_version": version,
+        })
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 resets connections when many clients connect at once
+    request_queue_size = 128
+
+    def __init__(self, address, service):
+        super().__init__(address, PredictionHandler)
+        self.service = service
+        # A worker drains after this many responses (0 = never); set by PreforkMaster
+        self.max_requests = 0
+        self.draining = False
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def track_connection(self, delta):
+        with self._lock:
+            self.connections += delta
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+            recycle = self.max_requests and self.requests >= self.max_requests
+        if recycle:
+            self.begin_drain()
+
+    def begin_drain(self):
+        # Stop accepting; serve_forever() returns and wait_idle() lets open requests finish.
+        # shutdown() blocks until the accept loop exits, so it cannot run on that loop's thread
+        with self._lock:
+            if self.draining:
+                return
+            self.draining = True
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def wait_idle(self, timeout):
+        deadline = time.time() + timeout
+        while self.connections and time.time() < deadline:
+            time.sleep(0.05)
+
+
+def create_server(service, host="127.0.0.1", port=8600):
+    return PredictionServer((host, port), service)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON salary prediction service with dynamic micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--engine", choices=["xgboost", "numpy"], default="xgboost", help="Local model runtime")
+    parser.add_argument("--max-batch", type=int, default=256, help="Rows scored together at most")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="How long a batch waits to fill up")
+    parser.add_argument("--workers", type=int, default=1, help="Pre-forked worker processes sharing one loaded model")
+    parser.add_argument("--max-requests", type=int, default=0, help="Recycle a worker after this many responses (0 = never)")
+    parser.add_argument("--drain-timeout", type=float, default=10.0, help="Seconds a stopping worker waits for open connections")
+    parser.add_argument("--memory-report", type=float, default=0, help="Print per-process RSS/PSS every N seconds (0 = on SIGUSR1 only)")
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL, help="Seconds between checks for a retrained model (0 = never)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # Load and warm once in the master; workers inherit the pages copy-on-write.
+        # The master also watches for new models and replaces the workers with ones
+        # forked after the new model is loaded, so they share it too
+        service = ModelService(engine=args.engine, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, threads=1)
+        start = time.perf_counter()
+        service.load()
+        server = create_server(service, args.host, args.port)
+        print(f"🚀 Master {os.getpid()} loaded model {service.model_version} in {time.perf_counter() - start:.2f}s; "
+              f"serving on http://{args.host}:{args.port} with {args.workers} workers")
+        PreforkMaster(server, args.workers, service.start, max_requests=args.max_requests,
+                      drain_timeout=args.drain_timeout, report_interval=args.memory_report,
+                      reload=service.live.check, reload_interval=args.reload_interval).run()
+        return
+
+    service = ModelService(engine=args.engine, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    server = create_server(service, args.host, args.port)
+    service.start_in_background(args.reload_interval)
+    print(f"🚀 Serving on http://{args.host}:{args.port} (POST /predict, GET /healthz /readyz /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APPS = ["app.py", "app2.py", "enhanced_salary_app.py"]
+
+# Must not be imported before the user asks for something that needs them
+LAZY_MODULES = ["xgboost", "sklearn", "altair", "requests", "pandas", "joblib"]
+
+# Runs in a fresh interpreter under -X importtime; markers on stderr split the
+# import log into phases
+CHILD = r"""
+import json, sys, time
+
+def phase(name):
+    sys.stderr.write(f"@@phase {name}\n")
+    sys.stderr.flush()
+
+timings = {}
+phase("streamlit")
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+timings["streamlit"] = (time.perf_counter() - start) * 1000
+
+phase("render")
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=300).run()
+timings["render"] = (time.perf_counter() - start) * 1000
+
+phase("predict")
+start = time.perf_counter()
+at.get("button")[0].click().run()
+timings["predict"] = (time.perf_counter() - start) * 1000
+phase("end")
+
+print(json.dumps({
+    "timings": timings,
+    "success": [e.value for e in at.success],
+    "errors": [e.value for e in at.error] + [str(e.value) for e in at.exception],
+}))
+"""
+
+
+def parse_importtime(stderr):
+    # {phase: [(module, cumulative_ms, is_top_level)]}
+    phases = {}
+    current = None
+    for line in stderr.splitlines():
+        if line.startswith("@@phase "):
+            current = line.split(" ", 1)[1]
+            phases[current] = []
+        elif line.startswith("import time:") and current:
+            # "import time: self [us] | cumulative | imported package"; nesting is shown by indentation
+            _, cumulative_us, name = line[len("import time:"):].split("|")
+            if not cumulative_us.strip().isdigit():
+                continue
+            top_level = not name[1:].startswith(" ")
+            phases[current].append((name.strip(), int(cumulative_us) / 1000, top_level))
+    return phases
+
+
+def profile_app(app, engine):
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), SALARY_ENGINE=engine)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD, app],
+                          capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{app} failed to start:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    phases = parse_importtime(proc.stderr)
+    result["imports"] = {
+        name: sorted([(m, ms) for m, ms, top in entries if top], key=lambda e: -e[1])
+        for name, entries in phases.items()
+    }
+    result["modules"] = {name: sorted({m.split(".")[0] for m, _, _ in entries}) for name, entries in phases.items()}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start imports, first render and first prediction of the Streamlit apps.")
+    parser.add_argument("apps", nargs="*", default=APPS, help="Apps to profile")
+    parser.add_argument("--engine", choices=["xgboost", "numpy"], default="xgboost", help="SALARY_ENGINE for the local model")
+    parser.add_argument("--render-budget-ms", type=float, default=1500, help="Fail when the first render takes longer")
+    parser.add_argument("--predict-budget-ms", type=float, default=5000, help="Fail when the first prediction takes longer")
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports listed per phase")
+    parser.add_argument("--json", help="Also write the raw profile here")
+    args = parser.parse_args()
+
+    failures = []
+    report = {}
+    for app in args.apps:
+        result = profile_app(app, args.engine)
+        report[app] = result
+        timings = result["timings"]
+        print(f"\n🚀 {app} (engine={args.engine})")
+        print(f"   import streamlit  {timings['streamlit']:8.0f} ms")
+        print(f"   first render      {timings['render']:8.0f} ms")
+        print(f"   first prediction  {timings['predict']:8.0f} ms")
+        for phase in ("render", "predict"):
+            slowest = result["imports"].get(phase, [])[:args.top]
+            if slowest:
+                print(f"   slowest imports during {phase}:")
+                for module, ms in slowest:
+                    print(f"      {module:<40} {ms:8.1f} ms")
+
+        # Regression checks
+        if result["errors"] or not result["success"]:
+            failures.append(f"{app}: prediction failed {result['errors']}")
+        eager = sorted(set(LAZY_MODULES) & set(result["modules"].get("render", [])))
+        if eager:
+            failures.append(f"{app}: imported {', '.join(eager)} before the first prediction")
+        if timings["render"] > args.render_budget_ms:
+            failures.append(f"{app}: first render {timings['render']:.0f} ms > budget {args.render_budget_ms:.0f} ms")
+        if timings["predict"] > args.predict_budget_ms:
+            failures.append(f"{app}: first prediction {timings['predict']:.0f} ms > budget {args.predict_budget_ms:.0f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print()
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ All apps within the startup budget")
+
+
+if __name__ == "__main__":
+    main()
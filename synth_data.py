@@ -0,0 +1,204 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from jobl import DEPARTMENT_MAPPING, POSITION_MAPPING
+
+# Streams synthetic employee records shaped like employee_records.csv:
+#   python synth_data.py --rows 10000000 --output records_10m.csv
+#   python synth_data.py --rows 100000000 --output records_100m.parquet
+COLUMNS = ["Employee_ID", "Employee_Name", "Age", "Country", "Department", "Position", "Salary", "Joining_Date"]
+
+# Age, Salary and tenure (days before the newest joining date) are drawn together
+NUMERIC = ["Age", "Salary", "Tenure"]
+
+# Points of each fitted marginal distribution; sampled values are interpolated between them
+QUANTILES = 1001
+
+# Positions with at least this many source rows get their own salary distribution
+MIN_GROUP_ROWS = 500
+
+
+def _quantiles(values):
+    return np.quantile(np.asarray(values, dtype=np.float64), np.linspace(0, 1, QUANTILES))
+
+
+def _frequencies(values):
+    counts = pd.Series(values).value_counts()
+    return counts.index.to_numpy(dtype=object), (counts / counts.sum()).to_numpy()
+
+
+def fit_profile(path):
+    # Everything the generator reproduces, measured on the source file
+    data = pd.read_csv(path)
+    joining = pd.to_datetime(data["Joining_Date"], errors="coerce")
+    data = data.assign(Tenure=(joining.max() - joining).dt.days).dropna(subset=NUMERIC + ["Country", "Department", "Position"])
+
+    # Gaussian copula: correlation of the normal scores of each column's ranks
+    uniform = (data[NUMERIC].rank(method="average") - 0.5) / len(data)
+    scores = ndtri(uniform.to_numpy())
+    correlation = np.corrcoef(scores, rowvar=False)
+
+    pairs = data.groupby(["Department", "Position"]).size()
+    salary_by_position = {
+        position: _quantiles(group) for position, group in data.groupby("Position")["Salary"]
+        if len(group) >= MIN_GROUP_ROWS
+    }
+    return {
+        "latest_joining": joining.max().normalize(),
+        "names": _frequencies(data["Employee_Name"].fillna("")),
+        "countries": _frequencies(data["Country"]),
+        # Department and position are drawn as a pair, keeping any dependence between them
+        "pairs": (pairs.index.get_level_values(0).to_numpy(dtype=object),
+                  pairs.index.get_level_values(1).to_numpy(dtype=object),
+                  (pairs / pairs.sum()).to_numpy()),
+        "marginals": {name: _quantiles(data[name]) for name in NUMERIC},
+        "salary_by_position": salary_by_position,
+        "correlation": correlation,
+    }
+
+
+def _aliases(mapping, canonical):
+    # Raw spellings whose normalized value exists in the source, e.g. "Tech" for Engineering
+    aliases = {}
+    for raw, value in mapping.items():
+        if value in canonical:
+            aliases.setdefault(value, []).append(raw)
+    return aliases
+
+
+def _with_aliases(values, aliases, rate, rng):
+    # Replaces a share of canonical values with one of their raw spellings
+    if not rate or not aliases:
+        return values
+    values = values.copy()
+    hit = rng.random(len(values)) < rate
+    for value, raws in aliases.items():
+        rows = np.flatnonzero(hit & (values == value))
+        values[rows] = np.asarray(raws, dtype=object)[rng.integers(len(raws), size=len(rows))]
+    return values
+
+
+def _choice(rng, options, rows):
+    values, probabilities = options
+    return values[rng.choice(len(values), size=rows, p=probabilities)]
+
+
+def generate_chunk(profile, rows, start_id, rng, alias_rate=0.0):
+    # Correlated uniforms from the copula, mapped through each fitted marginal
+    normals = rng.multivariate_normal(np.zeros(len(NUMERIC)), profile["correlation"], size=rows, method="cholesky")
+    uniform = ndtr(normals)
+    grid = np.linspace(0, 1, QUANTILES)
+    numeric = {name: np.interp(uniform[:, i], grid, profile["marginals"][name]) for i, name in enumerate(NUMERIC)}
+
+    pair_departments, pair_positions, probabilities = profile["pairs"]
+    pairs = rng.choice(len(probabilities), size=rows, p=probabilities)
+    departments, positions = pair_departments[pairs], pair_positions[pairs]
+    salary = numeric["Salary"]
+    for position, quantiles in profile["salary_by_position"].items():
+        rows_in = positions == position
+        salary[rows_in] = np.interp(uniform[rows_in, NUMERIC.index("Salary")], grid, quantiles)
+
+    joining = np.datetime64(profile["latest_joining"].date()) - np.rint(numeric["Tenure"]).astype("timedelta64[D]")
+    return pd.DataFrame({
+        "Employee_ID": np.arange(start_id, start_id + rows, dtype=np.int64),
+        "Employee_Name": _choice(rng, profile["names"], rows),
+        "Age": np.rint(numeric["Age"]).astype(np.int64),
+        "Country": _choice(rng, profile["countries"], rows),
+        "Department": _with_aliases(departments, _aliases(DEPARTMENT_MAPPING, set(departments)), alias_rate, rng),
+        "Position": _with_aliases(positions, _aliases(POSITION_MAPPING, set(positions)), alias_rate, rng),
+        "Salary": np.round(salary, 2),
+        "Joining_Date": np.datetime_as_string(joining, unit="D"),
+    }, columns=COLUMNS)
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class _ArrowWriter:
+    # pyarrow writes CSV several times faster than pandas, and is required for Parquet
+    def __init__(self, path, fmt):
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+
+        self.writer = None
+        # Arrow quotes every string field; readers see the same values as in the source file
+        self.opener = (lambda schema: pq.ParquetWriter(path, schema, compression="zstd")) if fmt == "parquet" \
+            else (lambda schema: pa_csv.CSVWriter(path, schema))
+
+    def write(self, chunk):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.opener(table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_writer(path):
+    fmt = "parquet" if path.endswith(".parquet") else "csv"
+    try:
+        return _ArrowWriter(path, fmt)
+    except ImportError:
+        if fmt == "parquet":
+            raise
+        return _CsvWriter(path)
+
+
+def write_records(output, rows, source="employee_records.csv", chunksize=1_000_000, seed=0, alias_rate=0.0):
+    # Chunks are generated and written one at a time, so memory stays flat at any size.
+    # Each chunk has its own seed: a run is reproducible for a given seed and chunksize
+    profile = fit_profile(source)
+    seeds = np.random.SeedSequence(seed).spawn((rows + chunksize - 1) // chunksize)
+    writer = open_writer(output)
+    written = 0
+    try:
+        for chunk_seed in seeds:
+            size = min(chunksize, rows - written)
+            writer.write(generate_chunk(profile, size, written + 1, np.random.default_rng(chunk_seed), alias_rate))
+            written += size
+    finally:
+        writer.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic employee records shaped like the source file.")
+    parser.add_argument("--source", default="employee_records.csv", help="Records the distributions are fitted on")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Records to generate")
+    parser.add_argument("--output", default="synthetic_records.csv", help="CSV, or Parquet if it ends in .parquet")
+    parser.add_argument("--chunksize", type=int, default=1_000_000, help="Records generated and written per chunk")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--alias-rate", type=float, default=0.0,
+                        help="Share of departments/positions written as a raw alias (e.g. 'Tech', 'Software Dev')")
+    args = parser.parse_args()
+    if args.rows < 1 or args.chunksize < 1:
+        parser.error("--rows and --chunksize must be at least 1")
+
+    start = time.perf_counter()
+    rows = write_records(args.output, args.rows, args.source, args.chunksize, args.seed, args.alias_rate)
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"✅ {rows:,} records → {args.output} ({size_mb:,.0f} MB) in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
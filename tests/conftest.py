@@ -0,0 +1,17 @@
+import os
+import sys
+
+import joblib
+import pytest
+
+# Tests import the top-level modules and read the committed artifacts, wherever pytest is run from
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jobl import ENCODERS_PATH, MODEL_PATH, SCALER_PATH  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def artifacts():
+    # The committed *_clean.pkl model, scaler and encoders
+    return tuple(joblib.load(os.path.join(ROOT, name)) for name in (MODEL_PATH, SCALER_PATH, ENCODERS_PATH))
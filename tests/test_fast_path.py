@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from jobl import DEPARTMENT_MAPPING, POSITION_MAPPING, FastPreprocessor, encode_features, predict_batch, predict_one
+
+
+def seeded_records(label_encoders, n=500, seed=0):
+    # Known labels, raw aliases and unknown labels; whole, fractional and missing numbers
+    rng = np.random.default_rng(seed)
+    labels = {
+        "Country": list(label_encoders["Country"].classes_) + ["Atlantis"],
+        "Department": list(label_encoders["Department"].classes_) + list(DEPARTMENT_MAPPING) + ["Legal"],
+        "Position": list(label_encoders["Position"].classes_) + list(POSITION_MAPPING) + ["Astronaut"],
+    }
+    numbers = {"Age": [18.0, 30.5, 65.0, 80.0, np.nan], "YearsExperience": [0.0, 2.5, 40.0, 55.0, np.nan]}
+    ranges = {"Age": (18, 66), "YearsExperience": (0, 41)}
+    records = []
+    for _ in range(n):
+        record = {col: str(rng.choice(values)) for col, values in labels.items()}
+        for col, special in numbers.items():
+            # Mostly UI-range integers, sometimes an edge case
+            record[col] = float(rng.choice(special)) if rng.random() < 0.2 else int(rng.integers(*ranges[col]))
+        records.append(record)
+    return records
+
+
+@pytest.fixture(scope="module")
+def records(artifacts):
+    return seeded_records(artifacts[2])
+
+
+def test_transform_is_bit_identical_to_batch_scaling(artifacts, records):
+    model, scaler, label_encoders = artifacts
+    fast = FastPreprocessor(scaler, label_encoders)
+    features, error_mask, errors = encode_features(pd.DataFrame(records), label_encoders)
+    scaled = scaler.transform(features[~error_mask])
+
+    valid = iter(scaled)
+    for record, bad, error in zip(records, error_mask, errors):
+        row, fast_error = fast.transform(record)
+        assert fast_error == error
+        if not bad:
+            assert np.array_equal(row[0], next(valid))
+
+
+def test_predict_one_matches_predict_batch(artifacts, records):
+    model, scaler, label_encoders = artifacts
+    fast = FastPreprocessor(scaler, label_encoders)
+    predictions, error_mask, errors = predict_batch(pd.DataFrame(records), model, scaler, label_encoders)
+    assert 0 < error_mask.sum() < len(records)
+
+    for record, expected, bad, error in zip(records, predictions, error_mask, errors):
+        prediction, fast_error = predict_one(record, model, fast)
+        assert fast_error == error
+        if not bad:
+            assert np.float32(prediction) == expected
@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from jobl import FEATURES
+from model_bundle import load_bundle, write_bundle
+from numpy_trees import TreeEnsemble, export_trees
+
+# Leaves are summed in a different order than in xgboost, so float32 rounding differs
+# (about ₹0.13 at most on these inputs); 1e-5 is about ₹1 on a ₹1 lakh salary
+RTOL = 1e-5
+
+
+def seeded_inputs(scaler, label_encoders, n=5000, seed=0):
+    # Raw features spanning the vocabularies, the UI ranges and a little beyond, with some missing values
+    rng = np.random.default_rng(seed)
+    raw = np.column_stack([
+        rng.integers(10, 80, n),
+        rng.integers(0, len(label_encoders["Country"].classes_), n),
+        rng.integers(0, len(label_encoders["Department"].classes_), n),
+        rng.integers(0, len(label_encoders["Position"].classes_), n),
+        rng.integers(-2, 50, n),
+    ]).astype(np.float64)
+    raw[rng.random(raw.shape) < 0.02] = np.nan
+    return (raw - scaler.mean_) / scaler.scale_
+
+
+@pytest.fixture(scope="module")
+def ensemble(artifacts):
+    model, _, _ = artifacts
+    return TreeEnsemble(export_trees(model.get_booster()))
+
+
+def test_matches_xgboost_predict(artifacts, ensemble):
+    model, scaler, label_encoders = artifacts
+    X = seeded_inputs(scaler, label_encoders)
+    assert np.isnan(X).any(axis=1).sum() > 0
+    np.testing.assert_allclose(ensemble.predict(X), model.predict(X), rtol=RTOL)
+
+
+def test_block_size_does_not_change_predictions(artifacts, ensemble):
+    model, scaler, label_encoders = artifacts
+    X = seeded_inputs(scaler, label_encoders, n=1000, seed=1)
+    small = TreeEnsemble(export_trees(model.get_booster()), block_rows=7)
+    np.testing.assert_array_equal(small.predict(X), ensemble.predict(X))
+    np.testing.assert_array_equal(ensemble.predict(X[:1]), ensemble.predict(X)[:1])
+
+
+def test_rejects_wrong_feature_count(ensemble):
+    with pytest.raises(ValueError, match="features"):
+        ensemble.predict(np.zeros((3, ensemble.n_features_in_ + 1)))
+
+
+def test_numpy_bundle_matches_xgboost_bundle(artifacts, tmp_path):
+    model, scaler, label_encoders = artifacts
+    path = str(tmp_path / "bundle")
+    write_bundle(model, scaler, label_encoders, path)
+    X = seeded_inputs(scaler, label_encoders, n=1000, seed=2)
+    np_model, np_scaler, np_encoders, _ = load_bundle(path, engine="numpy")
+    np.testing.assert_array_equal(np_scaler.transform(X), scaler.transform(pd.DataFrame(X, columns=FEATURES)))
+    for col, le in label_encoders.items():
+        assert list(np_encoders[col].classes_) == list(le.classes_)
+    np.testing.assert_allclose(np_model.predict(X), model.predict(X), rtol=RTOL)
+
+
+def test_numpy_bundle_imports_neither_sklearn_nor_xgboost(artifacts, tmp_path):
+    model, scaler, label_encoders = artifacts
+    path = str(tmp_path / "bundle")
+    write_bundle(model, scaler, label_encoders, path)
+    # A fresh interpreter, since this one has both loaded already
+    script = (
+        "import sys\n"
+        "from model_bundle import load_bundle\n"
+        f"load_bundle({path!r}, engine='numpy')\n"
+        "print(sorted(m for m in ('sklearn', 'scipy', 'xgboost') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True,
+                            env={**os.environ, "PYTHONPATH": ROOT})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
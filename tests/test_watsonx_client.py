@@ -0,0 +1,104 @@
+import pytest
+
+from mock_watsonx import mock_salary, start_mock_server
+from result_cache import ResultCache
+from watsonx_client import WatsonxClient, WatsonxError
+
+
+def row(age, employee_id="EMP102"):
+    return [employee_id, "Test User", age, "India", "IT", "Software Engineer", "2023-01-01"]
+
+
+@pytest.fixture
+def server():
+    # Fresh mock IAM + deployment on an ephemeral port, so stats start at zero
+    server = start_mock_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, **options):
+    return WatsonxClient("dummy", iam_url=f"{server.base_url}/identity/token", scoring_base_url=server.base_url, **options)
+
+
+def test_token_is_reused_and_connections_pooled(server):
+    client = make_client(server)
+    for age in range(20, 40):
+        assert client.score_one(row(age)) == mock_salary(row(age))
+    assert server.stats["token_requests"] == 1
+    assert server.stats["scoring_requests"] == 20
+    assert server.stats["connections"] == 1
+    client.close()
+
+
+def test_revoked_token_is_replaced_once(server):
+    client = make_client(server)
+    client.score_one(row(30))
+    with server.lock:
+        server.tokens.clear()
+    assert client.score_one(row(31)) == mock_salary(row(31))
+    assert server.stats["token_requests"] == 2
+    # The 401 and the retry with the new token
+    assert server.stats["scoring_requests"] == 3
+    client.close()
+
+
+def test_transient_failures_are_retried(server):
+    client = make_client(server)
+    server.fail_first = 2
+    values = [row(age) for age in range(20, 30)]
+    assert client.score_batch(values, backoff=0) == [mock_salary(r) for r in values]
+    assert server.stats["scoring_requests"] == 3
+    client.close()
+
+
+def test_retries_stop_after_max_retries(server):
+    client = make_client(server)
+    server.fail_first = 10
+    with pytest.raises(WatsonxError, match="503"):
+        client.score_batch([row(30)], max_retries=2, backoff=0)
+    assert server.stats["scoring_requests"] == 3
+    client.close()
+
+
+def test_client_errors_are_not_retried(server):
+    client = make_client(server)
+    server.error_status = 400
+    server.fail_first = 1
+    with pytest.raises(WatsonxError, match="400"):
+        client.score_batch([row(30)], backoff=0)
+    assert server.stats["scoring_requests"] == 1
+    client.close()
+
+
+def test_cache_serves_equivalent_rows(server):
+    client = make_client(server, cache=ResultCache(maxsize=16, ttl=60))
+    first = client.score_one(row(30))
+    # 30.0 and a padded id normalize to the same key
+    assert client.score_one(row(30.0, " EMP102 ")) == first
+    assert server.stats["scoring_requests"] == 1
+    assert client.cache.stats()["hits"] == 1
+    client.close()
+
+
+def test_score_rows_keeps_input_order(server):
+    server.latency = 0.01
+    client = make_client(server, pool_size=4)
+    values = [row(18 + i % 48, f"EMP{i}") for i in range(1000)]
+    predictions, errors = client.score_rows(values, batch_size=37, concurrency=4, backoff=0)
+    assert predictions == [mock_salary(r) for r in values]
+    assert errors == [None] * len(values)
+    assert server.stats["scored_rows"] == len(values)
+    client.close()
+
+
+def test_failed_batch_marks_only_its_rows(server):
+    client = make_client(server)
+    server.error_status = 400
+    server.fail_first = 1
+    values = [row(20 + i) for i in range(10)]
+    predictions, errors = client.score_rows(values, batch_size=5, concurrency=1, backoff=0)
+    assert predictions[:5] == [None] * 5 and all(e and "400" in e for e in errors[:5])
+    assert predictions[5:] == [mock_salary(r) for r in values[5:]] and errors[5:] == [None] * 5
+    client.close()
@@ -0,0 +1,167 @@
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBRegressor
+
+from ingest import load_training_data
+from jobl import FEATURES
+from model_bundle import BUNDLE_DIR, write_bundle
+
+# Values tried for each hyperparameter (my.py uses 200 / 0.05 / 6)
+SEARCH_SPACE = {
+    "n_estimators": [100, 200, 400],
+    "learning_rate": [0.03, 0.05, 0.1],
+    "max_depth": [4, 6, 8],
+    "min_child_weight": [1, 5],
+    "subsample": [0.8, 1.0],
+}
+
+
+def sample_configs(space, trials, seed=42):
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    if trials and trials < len(grid):
+        grid = random.Random(seed).sample(grid, trials)
+    return grid
+
+
+# ------------------------------
+# Worker side: folds are memory-mapped once per process, never pickled per task
+# ------------------------------
+_shared = {}
+
+
+def _init_worker(fold_dir, best_rmse, threads):
+    _shared["X"] = np.load(os.path.join(fold_dir, "X.npy"), mmap_mode="r")
+    _shared["y"] = np.load(os.path.join(fold_dir, "y.npy"), mmap_mode="r")
+    _shared["fold"] = np.load(os.path.join(fold_dir, "fold.npy"), mmap_mode="r")
+    _shared["best"] = best_rmse
+    _shared["threads"] = threads
+
+
+def evaluate_config(config, n_folds, prune_margin):
+    X, y, fold = _shared["X"], _shared["y"], _shared["fold"]
+    best = _shared["best"]
+    start = time.perf_counter()
+    scores = []
+    pruned = False
+
+    for k in range(n_folds):
+        train, test = fold != k, fold == k
+        model = XGBRegressor(tree_method="hist", n_jobs=_shared["threads"], random_state=42, **config)
+        model.fit(X[train], y[train])
+        pred = model.predict(X[test])
+        scores.append(float(np.sqrt(np.mean((y[test] - pred) ** 2))))
+
+        # Give up once this config is clearly worse than the best finished one
+        if k + 1 < n_folds and np.mean(scores) > best.value * (1 + prune_margin):
+            pruned = True
+            break
+
+    mean_rmse = float(np.mean(scores))
+    if not pruned:
+        with best.get_lock():
+            if mean_rmse < best.value:
+                best.value = mean_rmse
+
+    return {
+        **config,
+        "mean_rmse": mean_rmse,
+        "std_rmse": float(np.std(scores)),
+        "folds": len(scores),
+        "pruned": pruned,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+# ------------------------------
+# Driver
+# ------------------------------
+def prepare_folds(fold_dir, X, y, n_folds, seed=42):
+    fold = np.empty(len(X), dtype=np.int8)
+    for k, (_, test) in enumerate(KFold(n_splits=n_folds, shuffle=True, random_state=seed).split(X)):
+        fold[test] = k
+    np.save(os.path.join(fold_dir, "X.npy"), np.ascontiguousarray(X))
+    np.save(os.path.join(fold_dir, "y.npy"), np.ascontiguousarray(y))
+    np.save(os.path.join(fold_dir, "fold.npy"), fold)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for the salary model.")
+    parser.add_argument("--data", default="employee_records.csv", help="Employee records CSV")
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--trials", type=int, default=30, help="Configs sampled from the search space (0 = full grid)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel worker processes")
+    parser.add_argument("--prune-margin", type=float, default=0.05,
+                        help="Stop a config early when its running RMSE is this much worse than the best")
+    parser.add_argument("--output", default="tuning", help="Directory for the leaderboard and winning artifacts")
+    parser.add_argument("--promote", action="store_true", help="Also overwrite the *_clean.pkl artifacts the apps load")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    X_encoded, y, label_encoders, _ = load_training_data(args.data)
+    X = pd.DataFrame(X_encoded, columns=FEATURES).astype(np.float64)
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    configs = sample_configs(SEARCH_SPACE, args.trials)
+    workers = max(1, min(args.workers, len(configs)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🔎 {len(configs)} configs × {args.folds} folds on {workers} workers ({threads} threads each)")
+
+    fold_dir = tempfile.mkdtemp(prefix="salary_folds_")
+    results = []
+    try:
+        prepare_folds(fold_dir, X_scaled, y, args.folds)
+        best_rmse = mp.Value("d", float("inf"))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(fold_dir, best_rmse, threads)) as pool:
+            futures = [pool.submit(evaluate_config, config, args.folds, args.prune_margin) for config in configs]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                status = "✂️ pruned" if result["pruned"] else "✅"
+                params = {k: result[k] for k in SEARCH_SPACE}
+                print(f"{status} RMSE ₹{result['mean_rmse']:,.2f} after {result['folds']} folds — {params}")
+    finally:
+        shutil.rmtree(fold_dir, ignore_errors=True)
+
+    # === Leaderboard: finished configs first, best RMSE on top ===
+    os.makedirs(args.output, exist_ok=True)
+    leaderboard = pd.DataFrame(results).sort_values(["pruned", "mean_rmse"]).reset_index(drop=True)
+    leaderboard.to_csv(os.path.join(args.output, "leaderboard.csv"), index=False)
+    best = {k: leaderboard.loc[0, k] for k in SEARCH_SPACE}
+    best = {k: (v.item() if hasattr(v, "item") else v) for k, v in best.items()}
+
+    # === Refit the winner on all rows and save it like my.py does ===
+    model = XGBRegressor(tree_method="hist", n_jobs=os.cpu_count(), random_state=42, **best)
+    model.fit(X_scaled, y)
+    with open(os.path.join(args.output, "best_params.json"), "w") as f:
+        json.dump({"params": best, "cv_rmse": float(leaderboard.loc[0, "mean_rmse"]), "folds": args.folds}, f, indent=2)
+
+    targets = [args.output] + (["."] if args.promote else [])
+    for target in targets:
+        joblib.dump(model, os.path.join(target, "salary_model_clean.pkl"))
+        joblib.dump(scaler, os.path.join(target, "scaler_clean.pkl"))
+        joblib.dump(label_encoders, os.path.join(target, "label_encoders_clean.pkl"))
+        write_bundle(model, scaler, label_encoders, os.path.join(target, BUNDLE_DIR))
+
+    pruned = int(leaderboard["pruned"].sum())
+    print(f"🏆 Best CV RMSE ₹{leaderboard.loc[0, 'mean_rmse']:,.2f} with {best}")
+    print(f"✅ {len(results)} configs ({pruned} pruned) in {time.perf_counter() - start:.1f}s → {args.output}/")
+
+
+if __name__ == "__main__":
+    main()
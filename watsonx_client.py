@@ -0,0 +1,213 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import stage
+from result_cache import ResultCache
+
+# Override these to point the client at a local stand-in (see mock_watsonx.py)
+IAM_URL = os.getenv("WATSON_IAM_URL", "https://iam.cloud.ibm.com/identity/token")
+SCORING_BASE_URL = os.getenv("WATSON_SCORING_BASE_URL", "https://au-syd.ml.cloud.ibm.com")
+DEPLOYMENT_ID = os.getenv("WATSON_DEPLOYMENT_ID", "23558892-2ba7-4318-a1c3-ad980f07df57")
+API_VERSION = "2021-05-01"
+
+SCORING_FIELDS = ["Employee_ID", "Employee_Name", "Age", "Country", "Department", "Position", "Joining_Date"]
+
+# Refresh the IAM token this many seconds before IBM says it expires
+TOKEN_REFRESH_MARGIN = 300
+
+# Responses worth retrying (rate limited or transient server side failures)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class WatsonxError(Exception):
+    pass
+
+
+def default_result_cache():
+    # Set WATSON_CACHE_PATH to keep cached predictions across app restarts
+    return ResultCache(
+        maxsize=int(os.getenv("WATSON_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("WATSON_CACHE_TTL", "3600")),
+        path=os.getenv("WATSON_CACHE_PATH") or None,
+    )
+
+
+def _normalize(value):
+    # Same input, same key: numpy scalars, padded strings and 30.0 vs 30 all collapse
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class WatsonxClient:
+    def __init__(self, api_key, iam_url=IAM_URL, scoring_base_url=SCORING_BASE_URL,
+                 deployment_id=DEPLOYMENT_ID, refresh_margin=TOKEN_REFRESH_MARGIN,
+                 pool_size=10, timeout=30, cache=None):
+        self.api_key = api_key
+        self.cache = cache
+        self.iam_url = iam_url
+        self.deployment_id = deployment_id
+        self.scoring_url = (
+            f"{scoring_base_url.rstrip('/')}/ml/v4/deployments/{deployment_id}/predictions?version={API_VERSION}"
+        )
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+
+        # One pooled session so IAM and scoring calls reuse keep-alive connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # (token, expires_at), replaced as one tuple so a lock-free reader never
+        # pairs a token with another token's expiry or sees it cleared mid-check
+        self._credentials = (None, 0.0)
+        self._lock = threading.Lock()
+
+    def _valid_token(self):
+        token, expires_at = self._credentials
+        if token is not None and time.time() < expires_at - self.refresh_margin:
+            return token
+        return None
+
+    def get_token(self):
+        token = self._valid_token()
+        if token is not None:
+            return token
+        # Only one thread mints a token; the others wait and reuse it
+        with self._lock:
+            token = self._valid_token()
+            if token is None:
+                with stage("iam_token"):
+                    token = self._fetch_token()
+            return token
+
+    def _fetch_token(self):
+        try:
+            response = self.session.post(
+                self.iam_url,
+                data={"apikey": self.api_key, "grant_type": 'urn:ibm:params:oauth:grant-type:apikey'},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            raise WatsonxError(f"Token request failed: {e}") from e
+        if response.status_code != 200:
+            raise WatsonxError(f"Token fetch failed: {response.status_code} - {response.text}")
+
+        body = response.json()
+        now = time.time()
+        if "expiration" in body:
+            expires_at = float(body["expiration"])
+        else:
+            expires_at = now + float(body.get("expires_in", 3600))
+        self._credentials = (body["access_token"], expires_at)
+        return body["access_token"]
+
+    def invalidate_token(self, token=None):
+        # Only drop the token that failed, not one another thread just refreshed
+        with self._lock:
+            if token is None or token == self._credentials[0]:
+                self._credentials = (None, 0.0)
+
+    def post_scoring(self, values, fields=SCORING_FIELDS):
+        payload = {"input_data": [{"fields": fields, "values": values}]}
+        token = self.get_token()
+        response = self._post(payload, token)
+        if response.status_code == 401:
+            # Token revoked or expired early: mint a fresh one and try once more
+            self.invalidate_token(token)
+            response = self._post(payload, self.get_token())
+        return response
+
+    def cache_key(self, row):
+        # Deployment id first so a redeploy never serves the old model's answers
+        return (self.deployment_id,) + tuple(_normalize(v) for v in row)
+
+    def score_one(self, row):
+        key = self.cache_key(row) if self.cache is not None else None
+        if key is not None:
+            with stage("watsonx_cache"):
+                cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        response = self.post_scoring([row])
+        try:
+            with stage("parse_response"):
+                prediction = response.json()["predictions"][0]["values"][0][0]
+        except Exception as e:
+            raise WatsonxError(f"Error from Watson API: {e}\n\nRaw Response: {response.text}") from e
+
+        if key is not None:
+            self.cache.put(key, prediction)
+        return prediction
+
+    def _post(self, payload, token):
+        headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'}
+        try:
+            with stage("scoring_post"):
+                return self.session.post(self.scoring_url, json=payload, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise WatsonxError(f"Scoring request failed: {e}") from e
+
+    # ------------------------------
+    # Bulk scoring
+    # ------------------------------
+    def score_batch(self, values, max_retries=5, backoff=0.5, max_backoff=30.0):
+        for attempt in range(max_retries + 1):
+            last = attempt == max_retries
+            try:
+                response = self.post_scoring(values)
+            except WatsonxError:
+                if last:
+                    raise
+                time.sleep(self._retry_delay(attempt, None, backoff, max_backoff))
+                continue
+
+            if response.status_code == 200:
+                predictions = response.json()["predictions"][0]["values"]
+                if len(predictions) != len(values):
+                    raise WatsonxError(f"Expected {len(values)} predictions, got {len(predictions)}")
+                return [row[0] for row in predictions]
+            if response.status_code not in RETRY_STATUSES or last:
+                raise WatsonxError(f"Scoring failed: {response.status_code} - {response.text}")
+            time.sleep(self._retry_delay(attempt, response, backoff, max_backoff))
+
+    def _retry_delay(self, attempt, response, backoff, max_backoff):
+        # Full-jitter exponential backoff, never shorter than the server's Retry-After
+        delay = random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), max_backoff))
+        return delay
+
+    def score_rows(self, values, batch_size=500, concurrency=4, **retry):
+        # Returns (predictions, errors) in input order; rows of a batch that
+        # still fails after retries get None and that batch's error message
+        batches = [values[i:i + batch_size] for i in range(0, len(values), batch_size)]
+        predictions = [None] * len(values)
+        errors = [None] * len(values)
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = [pool.submit(self.score_batch, batch, **retry) for batch in batches]
+            for i, future in enumerate(futures):
+                start = i * batch_size
+                stop = start + len(batches[i])
+                try:
+                    predictions[start:stop] = future.result()
+                except (WatsonxError, ValueError, KeyError, IndexError) as e:
+                    errors[start:stop] = [f"❌ {e}"] * (stop - start)
+        return predictions, errors
+
+    def close(self):
+        self.session.close()